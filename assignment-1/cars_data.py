@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL = ('model', 'origin')
+# Bump when the derived columns or the file layout change
+CACHE_VERSION = 1
+
+
+def _file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _derive(df):
+    """Add the columns the plots compute from the raw table, vectorised."""
+    year = df['year'].to_numpy()
+    df['full_year'] = np.where(year < 100, year + 1900, year)
+    hp = df['horsepower'].to_numpy(dtype=float)
+    weight = df['weigth'].to_numpy(dtype=float)
+    df['hp_norm'] = (hp - hp.min()) / (hp.max() - hp.min())
+    df['weight_norm'] = (weight - weight.min()) / (weight.max() - weight.min())
+    # Marker size between 3 and 20, growing faster towards high horsepower
+    df['marker_size'] = 3 + df['hp_norm'] ** 1.5 * (20 - 3)
+    return df
+
+
+def _save_array(directory, name, array):
+    # Saved under a temporary name and renamed, so a frame still mapping the
+    # old file keeps reading it
+    tmp = os.path.join(directory, name + '.tmp.npy')
+    np.save(tmp, array)
+    os.replace(tmp, os.path.join(directory, name + '.npy'))
+
+
+def _save(directory, df, meta):
+    os.makedirs(directory, exist_ok=True)
+    # The key goes first and comes back last: an interrupted write leaves a
+    # cache without one, which is never used
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        os.remove(os.path.join(directory, 'meta.json'))
+    for name in df.columns:
+        column = df[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            _save_array(directory, name + '.codes', column.cat.codes.to_numpy())
+            _save_array(directory, name + '.categories', column.cat.categories.to_numpy(dtype=str))
+        else:
+            _save_array(directory, name, column.to_numpy())
+    _save_meta(directory, dict(meta, columns=list(df.columns), categorical=[
+        name for name in df.columns if isinstance(df[name].dtype, pd.CategoricalDtype)]))
+
+
+def _save_meta(directory, meta):
+    tmp = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(directory, 'meta.json'))
+
+
+def _load(directory):
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+
+    def column(name):
+        # Memory-mapped, so only the pages a plot touches are read; copy-on-write
+        # keeps the frame writable like a freshly parsed one without touching
+        # the cache. asarray keeps the mapping but hands pandas a plain ndarray
+        return np.asarray(np.load(os.path.join(directory, name + '.npy'), mmap_mode='c', allow_pickle=False))
+
+    columns = {}
+    for name in meta['columns']:
+        if name in meta['categorical']:
+            columns[name] = pd.Categorical.from_codes(column(name + '.codes'), column(name + '.categories'))
+        else:
+            columns[name] = column(name)
+    return pd.DataFrame(columns, copy=False), meta
+
+
+def load_cars(path='assignment-1/cars.csv', cache_dir=None):
+    """The cars table with its derived columns, from a binary cache when it is current.
+
+    The CSV is parsed once, with `model` and `origin` as categoricals, and
+    gets `full_year`, `hp_norm`, `weight_norm` (0..1) and `marker_size`
+    (3..20). The result is cached as one typed .npy array per column in a
+    directory under `cache_dir` (default: `.cache` next to the CSV) and
+    memory-mapped when loaded, so a warm start reads next to nothing up
+    front. The cache stays valid
+    while the CSV's size and modification time are unchanged; if only the
+    time moved (a fresh checkout, say) the content hash decides. A cache
+    that can't be written is skipped.
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(path), '.cache')
+    cache_path = os.path.join(cache_dir, os.path.basename(path))
+    stat = os.stat(path)
+    key = {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    content_hash = None
+    if os.path.exists(os.path.join(cache_path, 'meta.json')):
+        try:
+            df, meta = _load(cache_path)
+        except (OSError, ValueError, KeyError):
+            meta = None
+        if meta and all(meta.get(name) == value for name, value in key.items()):
+            return df
+        if meta and meta.get('version') == CACHE_VERSION and meta.get('size') == stat.st_size:
+            content_hash = _file_hash(path)
+            if meta.get('hash') == content_hash:
+                try:
+                    _save_meta(cache_path, dict(meta, **key))
+                except OSError:
+                    pass
+                return df
+
+    df = _derive(pd.read_csv(path, dtype={name: 'category' for name in CATEGORICAL}))
+    try:
+        _save(cache_path, df, dict(key, hash=content_hash or _file_hash(path)))
+    except OSError:
+        pass
+    return df
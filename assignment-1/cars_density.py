@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from matplotlib.colors import to_rgb
+from matplotlib.image import AxesImage
+
+
+def _edges(low, high, step, count):
+    if step is None:
+        return np.linspace(low, high, count + 1)
+    # Bins centred on multiples of `step`, e.g. one column per model year
+    first = np.floor(low / step + 0.5) - 0.5
+    last = np.ceil(high / step - 0.5) + 0.5
+    return np.arange(first, last + 0.5) * step
+
+
+class DensityRaster:
+    """The cars on the year x MPG plane aggregated into an image, for tables too big to scatter.
+
+    Every bin counts its cars per origin and sums their cylinders, in one
+    vectorised bincount over all rows. The bin gets the colour of its most
+    common origin, shaded darker the more cylinders its cars have on
+    average; its opacity grows with the log of the car count. Only the
+    visible range is binned, and zooming or panning re-aggregates it.
+
+    `x_step`/`y_step` give fixed bin widths in data units (aligned to
+    multiples of the step); without them a bin is `pixels_per_bin` pixels.
+    `highlight(origin)` dims the bins dominated by other origins, like the
+    scatter plot does on trendline hover.
+    """
+
+    def __init__(self, ax, x, y, origins, cylinders, colors, x_step=None, y_step=None, pixels_per_bin=6):
+        self.ax = ax
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.origins = list(colors)
+        self.origin_codes = pd.Categorical(origins, categories=self.origins).codes
+        self.cylinders = np.asarray(cylinders, dtype=float)
+        self.colors = np.array([to_rgb(colors[o]) for o in self.origins])
+        self.cyl_range = (self.cylinders.min(), self.cylinders.max()) if len(self.cylinders) else (0, 1)
+        self.x_step = x_step
+        self.y_step = y_step
+        self.pixels_per_bin = pixels_per_bin
+        self.highlighted = None
+        self._key = None
+        # Not imshow: the image follows the view, it must not set the limits
+        self.image = AxesImage(ax, origin='lower', interpolation='nearest', zorder=1)
+        ax.add_image(self.image)
+        if len(self.x):
+            ax.update_datalim([(self.x.min(), self.y.min()), (self.x.max(), self.y.max())])
+            ax.autoscale_view()
+        self.refresh()
+        ax.callbacks.connect('xlim_changed', self.refresh)
+        ax.callbacks.connect('ylim_changed', self.refresh)
+
+    def refresh(self, ax=None):
+        """Re-aggregate the visible range, if it changed since the last time."""
+        (x0, x1), (y0, y1) = sorted(self.ax.get_xlim()), sorted(self.ax.get_ylim())
+        width, height = self.ax.bbox.width, self.ax.bbox.height
+        key = (x0, x1, y0, y1, width, height)
+        if key == self._key:
+            return
+        self._key = key
+        self.x_edges = _edges(x0, x1, self.x_step, max(1, int(width / self.pixels_per_bin)))
+        self.y_edges = _edges(y0, y1, self.y_step, max(1, int(height / self.pixels_per_bin)))
+        nx, ny = len(self.x_edges) - 1, len(self.y_edges) - 1
+
+        # Bins are uniform, so a bin index is one subtract and divide per car
+        ix = np.floor((self.x - self.x_edges[0]) * (nx / (self.x_edges[-1] - self.x_edges[0]))).astype(np.intp)
+        iy = np.floor((self.y - self.y_edges[0]) * (ny / (self.y_edges[-1] - self.y_edges[0]))).astype(np.intp)
+        visible = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny) & (self.origin_codes >= 0)
+        flat = (iy * nx + ix)[visible]
+        n_origins = len(self.origins)
+        self.counts = np.bincount(flat * n_origins + self.origin_codes[visible],
+                                  minlength=nx * ny * n_origins).reshape(ny, nx, n_origins)
+        self.cylinder_sum = np.bincount(flat, weights=self.cylinders[visible], minlength=nx * ny).reshape(ny, nx)
+        self._render()
+
+    def _render(self):
+        total = self.counts.sum(axis=2)
+        dominant = self.counts.argmax(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_cyl = np.where(total > 0, self.cylinder_sum / total, self.cyl_range[0])
+        low, high = self.cyl_range
+        shade = 1.0 - 0.5 * (mean_cyl - low) / max(high - low, 1)
+
+        rgba = np.zeros(total.shape + (4,))
+        rgba[..., :3] = self.colors[dominant] * shade[..., None]
+        peak = np.log1p(total.max()) or 1.0
+        rgba[..., 3] = np.where(total > 0, 0.15 + 0.85 * np.log1p(total) / peak, 0.0)
+        if self.highlighted is not None:
+            rgba[..., 3] *= np.where(dominant == self.origins.index(self.highlighted), 1.0, 0.1)
+        self.image.set_data(rgba)
+        self._place((self.x_edges[0], self.x_edges[-1], self.y_edges[0], self.y_edges[-1]))
+
+    def _place(self, extent):
+        # set_extent also grows the data limits and autoscales to the image
+        data_lim = self.ax.dataLim.frozen()
+        autoscale = self.ax.get_autoscalex_on(), self.ax.get_autoscaley_on()
+        self.ax.set_autoscale_on(False)
+        self.image.set_extent(extent)
+        self.ax.dataLim.set(data_lim)
+        self.ax.set_autoscalex_on(autoscale[0])
+        self.ax.set_autoscaley_on(autoscale[1])
+        self.image.sticky_edges.x[:] = []
+        self.image.sticky_edges.y[:] = []
+
+    def highlight(self, origin):
+        if origin != self.highlighted:
+            self.highlighted = origin
+            self._render()
+
+    def bin_at(self, x, y):
+        """(row, column) of the non-empty bin under data position (x, y), or None."""
+        i = np.searchsorted(self.y_edges, y, side='right') - 1
+        j = np.searchsorted(self.x_edges, x, side='right') - 1
+        if 0 <= i < self.counts.shape[0] and 0 <= j < self.counts.shape[1] and self.counts[i, j].any():
+            return int(i), int(j)
+        return None
+
+    def centre(self, cell):
+        """Data coordinates of the centre of bin `cell`."""
+        i, j = cell
+        return ((self.x_edges[j] + self.x_edges[j + 1]) / 2, (self.y_edges[i] + self.y_edges[i + 1]) / 2)
+
+    def describe(self, cell):
+        """Tooltip text summarising the cars in bin `cell`."""
+        i, j = cell
+        counts = self.counts[i, j]
+        total = counts.sum()
+        lines = [f"Cars: {total}",
+                 f"MPG: {self.y_edges[i]:.1f}-{self.y_edges[i + 1]:.1f}",
+                 f"Avg cylinders: {self.cylinder_sum[i, j] / total:.1f}"]
+        lines += [f"{origin}: {count}" for origin, count in zip(self.origins, counts) if count]
+        return "\n".join(lines)
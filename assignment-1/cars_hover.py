@@ -0,0 +1,78 @@
+class HoverRenderer:
+    """Draws hover feedback by blitting over cached backgrounds.
+
+    A hover state (here: which origin is highlighted, or None) decides how
+    every static artist looks. `apply_state(state)` sets that look, e.g. the
+    scatter alphas. The full figure is rendered once per state and kept as a
+    background, so after the first visit a motion event only restores a
+    pixel buffer and draws the annotation on top. Redraw cost stays the same
+    however many points are plotted. Events that change neither the state nor
+    the annotation position draw nothing. A draw triggered from outside, like
+    a resize or zoom, drops the cached backgrounds.
+
+    Annotations are made animated so normal draws leave them out. So are the
+    `overlays`, extra artists like a point tooltip that are drawn on top in
+    every state while visible; after changing one, call update() with
+    `redraw=True`. On canvases that can't blit, the renderer falls back to
+    draw_idle().
+    """
+
+    def __init__(self, fig, apply_state, annotations, blit=True, overlays=()):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.apply_state = apply_state
+        self.annotations = annotations
+        self.overlays = list(overlays)
+        self.blit = blit and self.canvas.supports_blit
+        self.state = None
+        self.xy = None
+        self._backgrounds = {}
+        self._own_draw = False
+        for artist in [*annotations.values(), *self.overlays]:
+            artist.set_animated(self.blit)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # savefig draws at its own dpi, that is no screen background
+        if not self.blit or self.canvas.is_saving():
+            return
+        if not self._own_draw:
+            self._backgrounds.clear()
+        self._backgrounds[self.state] = self.canvas.copy_from_bbox(self.fig.bbox)
+        # A full draw wipes the animated annotation, put it back
+        self._draw_annotation()
+
+    def _draw_annotation(self):
+        for artist in [self.annotations.get(self.state), *self.overlays]:
+            if artist is not None and artist.get_visible():
+                self.fig.draw_artist(artist)
+
+    def update(self, state, xy=None, redraw=False):
+        """Show hover `state`, with its annotation at `xy` in data coordinates."""
+        if state == self.state and xy == self.xy and not redraw:
+            return
+        if state != self.state:
+            self.apply_state(state)
+            for key, annotation in self.annotations.items():
+                annotation.set_visible(key == state)
+        self.state = state
+        self.xy = xy
+        annotation = self.annotations.get(state)
+        if annotation is not None and xy is not None:
+            annotation.xy = xy
+
+        if not self.blit:
+            self.canvas.draw_idle()
+            return
+        background = self._backgrounds.get(state)
+        if background is None:
+            # First visit of this state: render it once, _on_draw caches it
+            self._own_draw = True
+            try:
+                self.canvas.draw()
+            finally:
+                self._own_draw = False
+        else:
+            self.canvas.restore_region(background)
+            self._draw_annotation()
+        self.canvas.blit(self.fig.bbox)
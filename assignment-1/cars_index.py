@@ -0,0 +1,54 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class PointIndex:
+    """Nearest plotted point under the cursor, as a row of the source table.
+
+    Built once over the data coordinates `x`, `y` of every plotted point with
+    `rows` giving each point's row position in the DataFrame (`df.iloc`), so
+    a hit needs no mask or float comparison to find its row again. Lookups
+    go through a KD-tree over the points' display (pixel) coordinates and
+    take O(log n). The tree is rebuilt lazily whenever the view limits or the
+    axes size change, i.e. after zooming, panning or resizing.
+
+    A point is hit when the cursor is within its marker radius plus
+    `tolerance` pixels. `sizes` are marker areas in points^2 as passed to
+    scatter(); without them every point gets a radius of `tolerance`.
+    """
+
+    def __init__(self, ax, x, y, rows=None, sizes=None, tolerance=3):
+        self.ax = ax
+        self.points = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+        self.rows = np.arange(len(self.points)) if rows is None else np.asarray(rows)
+        radii = np.zeros(len(self.points)) if sizes is None else np.sqrt(np.asarray(sizes, dtype=float)) / 2
+        self._radii_pt = radii
+        self.tolerance = tolerance
+        self._tree = None
+        self._key = None
+
+    def _view(self):
+        return (self.ax.viewLim.bounds, self.ax.bbox.bounds)
+
+    def _ensure_tree(self):
+        key = self._view()
+        if key != self._key:
+            self._tree = cKDTree(self.ax.transData.transform(self.points))
+            self.radii = self._radii_pt * self.ax.figure.dpi / 72 + self.tolerance
+            self.max_radius = self.radii.max() if len(self.radii) else 0.0
+            self._key = key
+        return self._tree
+
+    def nearest(self, x, y, k=8):
+        """(row, (x, y) in data coordinates) of the point hit at display position
+        (x, y), e.g. event.x/event.y, or None."""
+        if not len(self.points):
+            return None
+        tree = self._ensure_tree()
+        # The nearest centre may be a small marker just out of reach while a
+        # big marker a bit further away covers the cursor: check a few
+        distances, found = tree.query((x, y), k=min(k, len(self.points)), distance_upper_bound=self.max_radius)
+        for distance, i in zip(np.atleast_1d(distances), np.atleast_1d(found)):
+            if i < len(self.points) and distance <= self.radii[i]:
+                return self.rows[i], tuple(self.points[i])
+        return None
@@ -0,0 +1,67 @@
+import pandas as pd
+
+
+class CarStats:
+    """Every summary the cars plot needs, computed once per version of the data.
+
+    Built from the table `cars_data.load_cars()` returns, whose `hp_norm` and
+    `weight_norm` columns size and fade the markers. Holds the per-origin
+    trendline statistics and their annotation text, and for every (origin,
+    cylinders) group its rows, marker sizes and normal/dimmed alpha arrays.
+    Hover handlers only look things up here. `update()` recomputes everything, but
+    only when the table actually changed.
+    """
+
+    def __init__(self, df):
+        self.fingerprint = None
+        self.update(df)
+
+    def update(self, df):
+        """Recompute the summaries if `df` differs from the data they were built from."""
+        fingerprint = int(pd.util.hash_pandas_object(df, index=True).sum())
+        if fingerprint == self.fingerprint:
+            return False
+        self.fingerprint = fingerprint
+        self.df = df
+        self.hp_norm = df['hp_norm']
+        self.weight_norm = df['weight_norm']
+
+        self.origins = list(df['origin'].unique())
+        self.cylinders = sorted(df['cylinders'].unique())
+        self.origin_stats = {origin: self._origin_stats(df[df['origin'] == origin]) for origin in self.origins}
+        self.trend_text = {origin: self._trend_text(origin, stats) for origin, stats in self.origin_stats.items()}
+
+        # Groups in plotting order: origins as they appear, cylinders ascending
+        self.groups = {}
+        for origin in self.origins:
+            for cyl in self.cylinders:
+                mask = ((df['origin'] == origin) & (df['cylinders'] == cyl)).to_numpy()
+                if mask.any():
+                    alphas = 0.15 + 0.85 * self.weight_norm.to_numpy()[mask]
+                    self.groups[(origin, cyl)] = {
+                        'mask': mask,
+                        'sizes': 20 + self.hp_norm.to_numpy()[mask] * 800,
+                        'alphas': alphas,
+                        'dimmed': alphas * 0.1,
+                    }
+        return True
+
+    @staticmethod
+    def _origin_stats(origin_data):
+        yearly_data = origin_data.groupby('year')['MPG'].mean()
+        total_years = yearly_data.index.max() - yearly_data.index.min()
+        total_mpg_change = yearly_data.iloc[-1] - yearly_data.iloc[0]
+        avg_mpg = origin_data['MPG'].mean()
+        avg_hp = origin_data['horsepower'].mean()
+        return {
+            'yearly_mpg_change_pct': (total_mpg_change / yearly_data.iloc[0]) * 100 / total_years,
+            'avg_mpg': avg_mpg,
+            'avg_hp': avg_hp,
+            # Efficiency ratio (MPG per horsepower)
+            'efficiency_ratio': avg_mpg / avg_hp,
+        }
+
+    @staticmethod
+    def _trend_text(origin, stats):
+        return (f"{origin}\nYearly MPG Change: {stats['yearly_mpg_change_pct']:.1f}%\n"
+                f"Avg MPG: {stats['avg_mpg']:.1f}\nMPG/HP Ratio: {stats['efficiency_ratio']:.3f}")
@@ -1,13 +1,11 @@
-import pandas as pd
 import plotly.express as px
 import numpy as np
 
-# Load the data
-file_path = 'assignment-1/cars.csv'
-data = pd.read_csv(file_path)
+import cars_data
 
-# Convert the 'year' column to a full year
-data['full_year'] = data['year'].apply(lambda x: x + 1900 if x < 100 else x)
+# Load the data, with full_year, normalised horsepower/weight and marker_size
+file_path = 'assignment-1/cars.csv'
+data = cars_data.load_cars(file_path)
 
 # Define a color map based on origin
 origin_color_map = {'US': 'blue', 'Europe': 'green', 'Japan': 'red'}
@@ -31,23 +29,7 @@ origin_offset = {'US': -0.4, 'Europe': 0, 'Japan': 0.4}  # Smaller origin offset
 year_interval_offset = 1.0  # Larger offset between years
 
 # Create a new column with both the year offset and origin-based shift
-data['full_year_offset'] = data['full_year'] + data['origin'].map(origin_offset) + (data['full_year'] * year_interval_offset)
-
-# Calculate weight normalization like in visualisation.py
-weight_norm = (data['weigth'] - data['weigth'].min()) / (data['weigth'].max() - data['weigth'].min())
-
-# Calculate horsepower normalization like in visualisation.py
-hp_norm = (data['horsepower'] - data['horsepower'].min()) / (data['horsepower'].max() - data['horsepower'].min())
-
-# Define refined scaling function for marker sizes with more extreme scaling
-def scale_marker_size(horsepower):
-    min_size = 3
-    max_size = 20
-    normalized_hp = (horsepower - data['horsepower'].min()) / (data['horsepower'].max() - data['horsepower'].min())
-    return min_size + (normalized_hp ** 1.5) * (max_size - min_size)
-
-# Add scaled sizes to the dataframe
-data['marker_size'] = data['horsepower'].apply(scale_marker_size)
+data['full_year_offset'] = data['full_year'] + data['origin'].map(origin_offset).astype(float) + (data['full_year'] * year_interval_offset)
 
 # Create scatter plot with customized hover data and updated color palette
 fig = px.scatter(
@@ -137,7 +119,7 @@ fig.add_scatter(
     x=[None], y=[None],
     mode='markers',
     marker=dict(
-        size=3,  # Minimum size from scale_marker_size function
+        size=3,  # Minimum of the marker_size column
         color='gray',
         symbol='circle'
     ),
@@ -149,7 +131,7 @@ fig.add_scatter(
     x=[None], y=[None],
     mode='markers',
     marker=dict(
-        size=20,  # Maximum size from scale_marker_size function
+        size=20,  # Maximum of the marker_size column
         color='gray',
         symbol='circle'
     ),
@@ -1,16 +1,15 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.lines import Line2D
 from matplotlib.patches import Patch
-import mplcursors
 
-# Load the data
-file_path = 'assignment-1/cars.csv'
-data = pd.read_csv(file_path)
+import cars_data
+import cars_hover
+import cars_index
 
-# Convert the 'year' column to a full year
-data['full_year'] = data['year'].apply(lambda x: x + 1900 if x < 100 else x)
+# Load the data, with full_year, normalised horsepower/weight and marker_size
+file_path = 'assignment-1/cars.csv'
+data = cars_data.load_cars(file_path)
 
 # Define a color map based on origin
 origin_color_map = {'US': 'blue', 'Europe': 'green', 'Japan': 'red'}
@@ -36,26 +35,7 @@ origin_offset = {'US': -0.2, 'Europe': 0, 'Japan': 0.2}  # Smaller offsets betwe
 year_interval_offset = 0.5  # Reduced offset between years (was 2.0)
 
 # Create a new column with both the year offset and origin-based shift
-data['full_year_offset'] = data.apply(
-    lambda row: row['full_year'] + origin_offset[row['origin']],
-    axis=1
-)
-
-# Calculate weight normalization like in visualisation.py
-weight_norm = (data['weigth'] - data['weigth'].min()) / (data['weigth'].max() - data['weigth'].min())
-
-# Calculate horsepower normalization like in visualisation.py
-hp_norm = (data['horsepower'] - data['horsepower'].min()) / (data['horsepower'].max() - data['horsepower'].min())
-
-# Define refined scaling function for marker sizes with more extreme scaling
-def scale_marker_size(horsepower):
-    min_size = 3
-    max_size = 20
-    normalized_hp = (horsepower - data['horsepower'].min()) / (data['horsepower'].max() - data['horsepower'].min())
-    return min_size + (normalized_hp ** 1.5) * (max_size - min_size)
-
-# Add scaled sizes to the dataframe
-data['marker_size'] = data['horsepower'].apply(scale_marker_size)
+data['full_year_offset'] = data['full_year'] + data['origin'].map(origin_offset).astype(float)
 
 # Create figure and axis with larger size for better readability
 fig, ax = plt.subplots(figsize=(15, 10))
@@ -171,10 +151,6 @@ cbar = plt.colorbar(scatter, cax=cax)
 cbar.set_label('Weight (lbs)', fontsize=16, labelpad=15)
 cbar.ax.tick_params(labelsize=12)
 
-# Keep track of data for each scatter plot
-scatter_points = []
-scatter_data = []
-
 for origin in ['US', 'Europe', 'Japan']:
     for cylinders in cylinder_symbol_map.keys():
         mask = (data['origin'] == origin) & (data['cylinders'] == cylinders)
@@ -191,32 +167,37 @@ for origin in ['US', 'Europe', 'Japan']:
                 vmin=min_weight,  # Set the minimum value for the color scale
                 vmax=max_weight   # Set the maximum value for the color scale
             )
-            scatter_points.append(scatter)
-            scatter_data.append(subset)
-
-cursor = mplcursors.cursor(scatter_points, hover=True)
-
-@cursor.connect("add")
-def on_add(sel):
-    # Find which scatter plot was selected
-    scatter_index = scatter_points.index(sel.artist)
-    # Get the corresponding subset of data
-    subset = scatter_data[scatter_index]
-    
-    # Get the x and y coordinates of the selected point
-    x, y = sel.target
-    
-    # Find the matching row in the subset
-    mask = (subset['full_year_offset'] == x) & (subset['MPG'] == y)
-    point_data = subset[mask].iloc[0]
-    
-    text = (f"Model: {point_data['model']}\n"
-           f"MPG: {point_data['MPG']:.1f}\n"
-           f"Weight: {point_data['weigth']} lbs\n"
-           f"Horsepower: {point_data['horsepower']} HP\n"
-           f"Cylinders: {point_data['cylinders']}\n"
-           f"Origin: {point_data['origin']}")
-    sel.annotation.set_text(text)
+
+# Spatial index over all plotted points; a hit gives the row position in data
+points = cars_index.PointIndex(ax, data['full_year_offset'], data['MPG'], sizes=data['marker_size']*20)
+
+tooltip = ax.annotate('', xy=(0, 0), xytext=(-15, 15), textcoords='offset points', ha='right', va='bottom',
+                      bbox=dict(boxstyle='round,pad=.5', fc='yellow', alpha=.5, ec='k'),
+                      arrowprops=dict(arrowstyle='->', connectionstyle='arc3', shrinkB=0, ec='k'),
+                      visible=False)
+tooltip.row = None
+hover = cars_hover.HoverRenderer(fig, lambda state: None, {}, overlays=[tooltip])
+
+def on_move(event):
+    hit = points.nearest(event.x, event.y) if event.inaxes == ax else None
+    row = None if hit is None else hit[0]
+    if row == tooltip.row:
+        return
+    tooltip.row = row
+    tooltip.set_visible(hit is not None)
+    if hit is not None:
+        point_data = data.iloc[row]
+        text = (f"Model: {point_data['model']}\n"
+               f"MPG: {point_data['MPG']:.1f}\n"
+               f"Weight: {point_data['weigth']} lbs\n"
+               f"Horsepower: {point_data['horsepower']} HP\n"
+               f"Cylinders: {point_data['cylinders']}\n"
+               f"Origin: {point_data['origin']}")
+        tooltip.set_text(text)
+        tooltip.xy = hit[1]
+    hover.update(None, redraw=True)
+
+fig.canvas.mpl_connect('motion_notify_event', on_move)
 
 # Display the plot
 plt.show()
\ No newline at end of file
@@ -1,13 +1,23 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.path import Path
 import matplotlib.path as mpath
-import mplcursors
 
+import cars_data
+import cars_density
+import cars_hover
+import cars_index
+import cars_stats
 
-df = pd.read_csv('assignment-1/cars.csv')
+
+df = cars_data.load_cars('assignment-1/cars.csv')
+stats = cars_stats.CarStats(df)
+
+# Above this many rows the cars are drawn as an aggregated density raster
+# instead of one marker per car
+DENSITY_THRESHOLD = 50_000
+density = len(df) > DENSITY_THRESHOLD
 
 origin_colors = {
     'US': '#1f77b4',
@@ -43,6 +53,9 @@ for origin in df['origin'].unique():
     
     coefficients = np.polyfit(X.flatten(), y, 1)
     line = np.poly1d(coefficients)
+    if density:
+        # The same straight line, without a vertex per car
+        X = np.array([[X.min()], [X.max()]])
     
     trendline = plt.plot(X, line(X), 
             color=origin_colors[origin], 
@@ -53,28 +66,28 @@ for origin in df['origin'].unique():
             picker=True)[0] 
     trendlines.append((trendline, origin))
 
-hp_norm = (df['horsepower'] - df['horsepower'].min()) / (df['horsepower'].max() - df['horsepower'].min())
-weight_norm = (df['weigth'] - df['weigth'].min()) / (df['weigth'].max() - df['weigth'].min())
-
 legend_entries = set()
 scatter_plots = []
-for origin in df['origin'].unique():
-    for cyl in sorted(df['cylinders'].unique()):
-        mask = (df['origin'] == origin) & (df['cylinders'] == cyl)
-        if mask.any():
-            alphas = 0.15 + (0.85 * weight_norm[mask])
-            sizes = 20 + (hp_norm[mask] * 800)
-            scatter = plt.scatter(
-                df[mask]['year'],
-                df[mask]['MPG'],
-                s=sizes,
-                marker=cylinder_markers[cyl],
-                c=[origin_colors[origin]],
-                alpha=alphas,
-                label=f'{origin} - {cyl} cyl'
-            )
-            scatter_plots.append((scatter, mask))
-            legend_entries.add((origin, cyl))
+if density:
+    raster = cars_density.DensityRaster(plt.gca(), df['year'], df['MPG'], df['origin'], df['cylinders'],
+                                        origin_colors, x_step=1)
+for (origin, cyl), group in ({} if density else stats.groups).items():
+    mask = group['mask']
+    scatter = plt.scatter(
+        df[mask]['year'],
+        df[mask]['MPG'],
+        s=group['sizes'],
+        marker=cylinder_markers[cyl],
+        c=[origin_colors[origin]],
+        alpha=group['alphas'],
+        label=f'{origin} - {cyl} cyl'
+    )
+    scatter_plots.append((scatter, mask))
+    legend_entries.add((origin, cyl))
+
+# Group of each scatter, so hover handling only does lookups into `stats`
+scatter_groups = [(scatter, origin, stats.groups[(origin, cyl)])
+                  for (scatter, _), (origin, cyl) in zip(scatter_plots, stats.groups)]
 
 plt.suptitle('Evolution of Car Characteristics (1970-1982)', 
             fontsize=24, 
@@ -100,6 +113,11 @@ for origin, color in origin_colors.items():
     legend_elements.append(plt.scatter([], [], c=color, label=origin, marker='o', s=200))
 
 legend_elements.append(plt.scatter([], [], c='none', alpha=0, s=0, label='\n$\mathbf{Engine\ Configuration}$'))
+if density:
+    legend_elements.extend([
+        plt.scatter([], [], c=[(0.6, 0.6, 0.6)], marker='s', s=200, label='Few cylinders (avg)'),
+        plt.scatter([], [], c=[(0.3, 0.3, 0.3)], marker='s', s=200, label='Many cylinders (avg)')
+    ])
 for cyl in sorted(cylinder_markers.keys()):
     if any((origin, cyl) in legend_entries for origin in origin_colors):
         legend_elements.append(plt.scatter([], [], c='gray', marker=cylinder_markers[cyl], 
@@ -111,17 +129,24 @@ hp_max = df['horsepower'].max()
 weight_min = df['weigth'].min()
 weight_max = df['weigth'].max()
 
-legend_elements.append(plt.scatter([], [], c='none', alpha=0, s=0, label='\n$\mathbf{Horsepower}$'))
-legend_elements.extend([
-    plt.scatter([], [], c='gray', s=50, label=f'Low Horsepower (45hp)', alpha=0.7),
-    plt.scatter([], [], c='gray', s=600, label=f'High Horsepower (230hp)', alpha=0.7)
-])
-
-legend_elements.append(plt.scatter([], [], c='none', alpha=0, s=0, label='\n$\mathbf{Weight}$'))
-legend_elements.extend([
-    plt.scatter([], [], c='gray', s=200, alpha=0.15, label=f'Low Weight (1600lbs)'),
-    plt.scatter([], [], c='gray', s=200, alpha=1.0, label=f'High Weight (5200lbs)')
-])
+if density:
+    legend_elements.append(plt.scatter([], [], c='none', alpha=0, s=0, label='\n$\mathbf{Number\ of\ Cars}$'))
+    legend_elements.extend([
+        plt.scatter([], [], c='gray', marker='s', s=200, alpha=0.15, label='Few cars per cell'),
+        plt.scatter([], [], c='gray', marker='s', s=200, alpha=1.0, label='Many cars per cell')
+    ])
+else:
+    legend_elements.append(plt.scatter([], [], c='none', alpha=0, s=0, label='\n$\mathbf{Horsepower}$'))
+    legend_elements.extend([
+        plt.scatter([], [], c='gray', s=50, label=f'Low Horsepower (45hp)', alpha=0.7),
+        plt.scatter([], [], c='gray', s=600, label=f'High Horsepower (230hp)', alpha=0.7)
+    ])
+
+    legend_elements.append(plt.scatter([], [], c='none', alpha=0, s=0, label='\n$\mathbf{Weight}$'))
+    legend_elements.extend([
+        plt.scatter([], [], c='gray', s=200, alpha=0.15, label=f'Low Weight (1600lbs)'),
+        plt.scatter([], [], c='gray', s=200, alpha=1.0, label=f'High Weight (5200lbs)')
+    ])
 
 plt.legend(handles=legend_elements,
           fontsize=11,
@@ -140,88 +165,77 @@ plt.subplots_adjust(right=0.85)
 plt.grid(True, alpha=0.3)
 
 
-scatter_objects = [scatter for scatter, mask in scatter_plots]
-cursor = mplcursors.cursor(scatter_objects, hover=2)
-
-@cursor.connect("add")
-def on_add(sel):
-    artist = sel.artist
-    for scatter, mask in scatter_plots:
-        if scatter == artist:
-            df_filtered = df[mask]
-            ind = sel.target
-            if isinstance(ind, np.ma.MaskedArray):
-                ind = np.where(~ind.mask)[0][0]
-            row = df_filtered.iloc[ind]
-            model_name = row['model'].title().replace(' Iii', ' III').replace(' Ii', ' II').replace(' Iv', ' IV')
-            text = f"Model: {model_name}\nMPG: {row['MPG']:.1f}\nCylinders: {row['cylinders']}\nHorsepower: {row['horsepower']}\nWeight: {row['weigth']}\nYear: 19{row['year']}\nOrigin: {row['origin']}"
-            sel.annotation.set_text(text)
-            sel.annotation.get_bbox_patch().set(fc='white', alpha=0.8, ec='gray')
-            sel.annotation.set_visible(True)
-            break
-
-@cursor.connect("remove")
-def on_remove(sel):
-    if sel and sel.annotation:
-        sel.annotation.set_visible(False)
-        plt.draw()
-
+# Spatial index over every scatter point, each pointing back to its row in df
+if not density:
+    rows = np.concatenate([np.flatnonzero(group['mask']) for group in stats.groups.values()])
+    points = cars_index.PointIndex(plt.gca(), df['year'].to_numpy()[rows], df['MPG'].to_numpy()[rows], rows,
+                                   sizes=np.concatenate([group['sizes'] for group in stats.groups.values()]))
+
+tooltip = plt.annotate('', xy=(0, 0), xytext=(-15, 15), textcoords='offset points', ha='right', va='bottom',
+                       bbox=dict(boxstyle='round,pad=0.5', fc='white', alpha=0.8, ec='gray'),
+                       arrowprops=dict(arrowstyle='->', connectionstyle='arc3', shrinkB=0, ec='k'),
+                       visible=False)
+tooltip.key = None
+
+def find_hit(event):
+    # What is under the cursor: (row of df, position), or (bin, centre) in density mode
+    if density:
+        cell = raster.bin_at(event.xdata, event.ydata)
+        return None if cell is None else (cell, raster.centre(cell))
+    return points.nearest(event.x, event.y)
+
+def show_point(hit):
+    # Point the tooltip at `hit` (key, position) or hide it; True if anything changed
+    key = None if hit is None else hit[0]
+    if key == tooltip.key:
+        return False
+    tooltip.key = key
+    tooltip.set_visible(hit is not None)
+    if hit is not None and density:
+        tooltip.set_text(raster.describe(key))
+        tooltip.xy = hit[1]
+    elif hit is not None:
+        car = df.iloc[key]
+        model_name = car['model'].title().replace(' Iii', ' III').replace(' Ii', ' II').replace(' Iv', ' IV')
+        tooltip.set_text(f"Model: {model_name}\nMPG: {car['MPG']:.1f}\nCylinders: {car['cylinders']}\nHorsepower: {car['horsepower']}\nWeight: {car['weigth']}\nYear: 19{car['year']}\nOrigin: {car['origin']}")
+        tooltip.xy = hit[1]
+    return True
+
+
+def apply_hover_state(origin):
+    # Dim the scatter plots of every origin but the hovered one
+    if density:
+        raster.highlight(origin)
+    for scatter, scatter_origin, group in scatter_groups:
+        if origin is None or scatter_origin == origin:
+            scatter.set_alpha(group['alphas'])  # Keep original alpha for matching origin
+        else:
+            scatter.set_alpha(group['dimmed'])  # Dim others
+
+# Trendline annotations, filled with the statistics computed at load time
+for line, origin in trendlines:
+    line.annotation = plt.annotate(stats.trend_text[origin], xy=(0, 0), xytext=(10, 10),
+                                   textcoords='offset points',
+                                   bbox=dict(boxstyle='round,pad=0.5', fc='white', alpha=0.8, ec='gray'),
+                                   visible=False)
+
+# Set to False to redraw the whole figure on hover changes instead of blitting
+BLIT_HOVER = True
+hover = cars_hover.HoverRenderer(plt.gcf(), apply_hover_state,
+                                 {origin: line.annotation for line, origin in trendlines}, blit=BLIT_HOVER,
+                                 overlays=[tooltip])
 
 def on_move(event):
+    # Not hovering over a trendline: restore all alphas and hide annotations
+    state, xy, hit = None, None, None
     if event.inaxes:
-        hover_detected = False
-        
         # Check for trendline hover
         for line, origin in trendlines:
             if line.contains(event)[0]:
-                hover_detected = True
-                # Get data for this origin
-                origin_data = df[df['origin'] == origin]
-                
-                # Calculate yearly MPG changes
-                yearly_data = origin_data.groupby('year')['MPG'].mean()
-                total_years = yearly_data.index.max() - yearly_data.index.min()
-                total_mpg_change = yearly_data.iloc[-1] - yearly_data.iloc[0]
-                yearly_mpg_change_pct = (total_mpg_change / yearly_data.iloc[0]) * 100 / total_years
-                
-                # Calculate average MPG and horsepower
-                avg_mpg = origin_data['MPG'].mean()
-                avg_hp = origin_data['horsepower'].mean()
-                
-                # Calculate efficiency ratio (MPG per horsepower)
-                efficiency_ratio = avg_mpg / avg_hp
-                
-                # Create and position annotation
-                text = f"{origin}\nYearly MPG Change: {yearly_mpg_change_pct:.1f}%\nAvg MPG: {avg_mpg:.1f}\nMPG/HP Ratio: {efficiency_ratio:.3f}"
-                if not hasattr(line, 'annotation'):
-                    line.annotation = plt.annotate(text, xy=(0, 0), xytext=(10, 10),
-                                                 textcoords='offset points',
-                                                 bbox=dict(boxstyle='round,pad=0.5', fc='white', alpha=0.8, ec='gray'),
-                                                 visible=False)
-                
-                # Update annotation position
-                line.annotation.xy = (event.xdata, event.ydata)
-                line.annotation.set_visible(True)
-                
-                # Dim all scatter plots
-                for scatter, mask in scatter_plots:
-                    original_alphas = 0.15 + (0.85 * weight_norm[mask])
-                    if df[mask]['origin'].iloc[0] == origin:
-                        scatter.set_alpha(original_alphas)  # Keep original alpha for matching origin
-                    else:
-                        scatter.set_alpha(original_alphas * 0.1)  # Dim others
+                state, xy = origin, (event.xdata, event.ydata)
                 break
-        
-        # If not hovering over a trendline, restore all alphas and hide annotations
-        if not hover_detected:
-            for scatter, mask in scatter_plots:
-                original_alphas = 0.15 + (0.85 * weight_norm[mask])
-                scatter.set_alpha(original_alphas)
-            for line, _ in trendlines:
-                if hasattr(line, 'annotation'):
-                    line.annotation.set_visible(False)
-        
-        plt.draw()
+        hit = find_hit(event)
+    hover.update(state, xy, redraw=show_point(hit))
 
 # Connect the hover event
 plt.gcf().canvas.mpl_connect('motion_notify_event', on_move)
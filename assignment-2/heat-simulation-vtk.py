@@ -1,40 +1,157 @@
-import vtk
 import numpy as np
 import os
+import tempfile
+import json
+import argparse
+
+import heat_benchmarks
+import heat_checkpoint
+import heat_convergence
+import heat_geometry
+import heat_output
+import heat_solvers
+import heat_stencil
+import heat_sweep
+import heat_transient
+import heat_volume
+import heat_viewer
 
 class HeatDistributionSimulation:
-    def __init__(self, grid_size=90):
+    # "loop" is the original per-cell update, kept as the reference for
+    # checking that the vectorised "numpy" engine matches bit-for-bit;
+    # "threads" runs the numpy stencil as row bands on `workers` threads
+    ENGINES = ('loop', 'numpy', 'threads')
+    # "ram" keeps both ping-pong buffers in memory; "memmap" backs them with
+    # temporary files in `scratch_dir` and sweeps `block_rows` rows at a time,
+    # so grids larger than RAM stream through the page cache
+    STORAGES = ('ram', 'memmap')
+    # Field precision: "float32" halves the bytes each sweep moves, "mixed"
+    # sweeps in float32 but reports the float64 residual as max_change
+    PRECISIONS = ('float64', 'float32', 'mixed')
+
+    def __init__(self, grid_size=90, engine='numpy', workers=None, left_temp=32, right_temp=100,
+                 initial_temp=70, source_temp=212, source_size=None, storage='ram', scratch_dir=None,
+                 block_rows=256, precision='float64', geometry=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {self.ENGINES}")
+        if storage not in self.STORAGES:
+            raise ValueError(f"Unknown storage '{storage}', expected one of {self.STORAGES}")
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {self.PRECISIONS}")
+        if storage == 'memmap' and engine != 'numpy':
+            raise ValueError("memmap storage streams row blocks through the numpy engine only")
+        self.storage = storage
+        self.precision = precision
+        self.dtype = np.float64 if precision == 'float64' else np.float32
+        self.scratch_dir = scratch_dir
+        self.block_rows = block_rows
         self.grid_size = grid_size
-        self.temperature = np.zeros((grid_size, grid_size))
+        self.engine = engine
+        # Plate setup; source_size is the fraction of the plate width covered
+        # by the square heat source, None keeps the original middle third
+        self.left_temp = left_temp
+        self.right_temp = right_temp
+        self.initial_temp = initial_temp
+        self.source_temp = source_temp
+        self.source_size = source_size
+        # A heat_geometry.PlateGeometry or its JSON spec replaces the edges
+        # and source above with arbitrary regions and insulated edges
+        if isinstance(geometry, dict):
+            geometry = heat_geometry.PlateGeometry.from_spec(geometry)
+        self.geometry = geometry
+        self.temperature = self._allocate(self.dtype)
         self.initialize_conditions()
         self.iteration = 0
-        
+        if engine == 'threads':
+            self._bands = heat_stencil.BandedStencil(self.temperature.shape, workers, dtype=self.dtype)
+        elif storage == 'memmap':
+            self._bands = heat_stencil.RowBlockStencil(self.temperature.shape, self.block_rows, self.dtype)
+        else:
+            self._bands = None
+        # Small row blocks keep each block in cache between its sweep and its
+        # max-change reduction in the numpy engine
+        self._fused = heat_stencil.RowBlockStencil(self.temperature.shape, 16, self.dtype)
+
+    def _allocate(self, dtype):
+        shape = (self.grid_size, self.grid_size)
+        if self.storage == 'ram':
+            return np.zeros(shape, dtype=dtype)
+        # An unlinked temporary file, removed by the OS once the map is gone
+        return np.memmap(tempfile.TemporaryFile(dir=self.scratch_dir), dtype=dtype, mode='w+', shape=shape)
+
+    def config(self):
+        """Keyword arguments that rebuild this plate, as saved in checkpoints."""
+        return {'grid_size': self.grid_size, 'engine': self.engine, 'left_temp': self.left_temp,
+                'right_temp': self.right_temp, 'initial_temp': self.initial_temp,
+                'source_temp': self.source_temp, 'source_size': self.source_size, 'precision': self.precision,
+                'geometry': self.geometry.spec() if self.geometry is not None else None}
+
+    def source_bounds(self):
+        if self.source_size is None:
+            return self.grid_size // 3, 2 * self.grid_size // 3
+        width = int(round(self.source_size * self.grid_size))
+        start = (self.grid_size - width) // 2
+        return start, start + width
+
+    def plate_geometry(self):
+        """The geometry in use: the one given, or the original plate built from the temperatures."""
+        if self.geometry is not None:
+            return self.geometry
+        return heat_geometry.default_plate(self.grid_size, self.left_temp, self.right_temp,
+                                           self.source_temp, self.source_bounds())
+
     def initialize_conditions(self):
-        inner_start = self.grid_size // 3 
-        inner_end = 2 * self.grid_size // 3  
-        
-        self.temperature.fill(70)
-        
-        self.temperature[inner_start:inner_end, inner_start:inner_end] = 212
-        
-        self.temperature[:, 0] = 32
-        
-        self.temperature[:, -1] = 100
-        
-        for i in range(self.grid_size):
-            t = 32 + (100 - 32) * (i / (self.grid_size - 1))
-            self.temperature[0, i] = t 
-            self.temperature[-1, i] = t
+        # Compiled once into the mask of cells the stencil never updates
+        # (fixed temperatures and insulated edges) and the insulated-edge
+        # indices, so the sweeps never re-check coordinates. It is written one
+        # row block at a time: a memmapped plate needs no full-size temporary.
+        self.fixed_mask = self._allocate(bool)
+        self.neumann_index, self.neumann_source = self.plate_geometry().compile_into(
+            self.temperature, self.fixed_mask, self.initial_temp, self.block_rows)
+        self.apply_neumann(self.temperature)
+
+        # Second buffer for ping-ponging; fixed cells never change, so they
+        # only need to be written into it once
+        self._buffer = self._allocate(self.temperature.dtype)
+        np.copyto(self._buffer, self.temperature)
+
+    def apply_neumann(self, field):
+        # Insulated edges take the value one cell inwards: zero flux across the edge
+        if self.neumann_index.size:
+            np.put(field, self.neumann_index, field.take(self.neumann_source))
+
+    def iterate(self, check=True):
+        """One Jacobi sweep; returns the max change, or None when `check` is off.
 
-    def iterate(self):
+        Skipping the check saves the reduction on steps where nobody looks at
+        it, see heat_convergence.ConvergenceMonitor.
+        """
+        old = self.temperature
+        # Mixed precision measures the change in float64 below instead
+        sweep_check = check and self.precision != 'mixed'
+        if self._bands is not None:
+            max_change = self._iterate_bands(sweep_check)
+        elif self.engine == 'numpy':
+            max_change = self._iterate_numpy(sweep_check)
+        else:
+            max_change = self._iterate_loop()
+        self.apply_neumann(self.temperature)
+        if check and self.precision == 'mixed':
+            # `old` is untouched by the sweep, so its float64 residual is the
+            # exact change of this step
+            return heat_stencil.residual_norm(old, self.fixed_mask)
+        return max_change if check else None
+
+    def solve(self, method='sor', tolerance=0.01, max_iterations=10000):
+        """Relax straight to steady state with one of heat_solvers.SOLVERS."""
+        return heat_solvers.solve(self, method, tolerance, max_iterations)
+
+    def _iterate_loop(self):
         new_temp = np.copy(self.temperature)
-        inner_start = self.grid_size // 3
-        inner_end = 2 * self.grid_size // 3
         
         for i in range(1, self.grid_size-1):
             for j in range(1, self.grid_size-1):
-                if (inner_start <= i < inner_end and 
-                    inner_start <= j < inner_end):
+                if self.fixed_mask[i, j]:
                     continue
                     
                 new_temp[i, j] = 0.25 * (
@@ -49,36 +166,275 @@ class HeatDistributionSimulation:
         self.iteration += 1
         return max_change
 
+    def _iterate_numpy(self, check=True):
+        old = self.temperature
+        new = self._buffer
+
+        # Same summation order as the loop engine, so results are identical
+        if check:
+            max_change = self._fused.sweep(old, new, self.fixed_mask)
+        else:
+            heat_stencil.jacobi_rows(old, new, self.fixed_mask, 1, self.grid_size - 1)
+            max_change = None
+        self.temperature, self._buffer = new, old
+        self.iteration += 1
+        return max_change
+
+    def _iterate_bands(self, check=True):
+        old = self.temperature
+        new = self._buffer
+        max_change = self._bands.sweep(old, new, self.fixed_mask, check)
+        self.temperature, self._buffer = new, old
+        self.iteration += 1
+        return max_change
+
 def save_to_vtk(sim, timestep, output_dir="vtk_outpu_2", filename_template="heat_simulation_{:03d}.vts"):
     """Save the current temperature grid to a VTK file."""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
+
     filename = os.path.join(output_dir, filename_template.format(timestep))
-    points = vtk.vtkPoints()
-    scalars = vtk.vtkFloatArray()
-    scalars.SetName("Temperature")
-    
-    for i in range(sim.grid_size):
-        x = 9.0 * i / (sim.grid_size - 1)
-        for j in range(sim.grid_size):
-            y = 9.0 * j / (sim.grid_size - 1)
-            points.InsertNextPoint(x, y, 0)
-            scalars.InsertNextValue(sim.temperature[i, j])
-    
-    grid = vtk.vtkStructuredGrid()
-    grid.SetDimensions(sim.grid_size, sim.grid_size, 1)
-    grid.SetPoints(points)
-    grid.GetPointData().SetScalars(scalars)
-    
-    writer = vtk.vtkXMLStructuredGridWriter()
-    writer.SetFileName(filename)
-    writer.SetInputData(grid)
-    writer.Write()
+    if sim.storage == 'memmap':
+        exporter = heat_output.StreamingStructuredGridExporter(sim.grid_size, block_rows=sim.block_rows)
+    else:
+        exporter = heat_output.vtk_exporter(sim.grid_size)
+    exporter.write(sim.temperature, filename)
+
+def snapshot_writer(args, grid_size):
+    """The writer chain for the --output/--decimate/--async-queue options, and its AsyncWriter if any."""
+    size, extent = heat_output.decimated_grid(grid_size, args.decimate)
+    if args.output == 'hdf5':
+        writer = heat_output.HDF5TimeSeriesWriter(args.output_file or 'heat_simulation.vtkhdf', size, extent)
+    elif args.output == 'frames':
+        writer = heat_viewer.FrameRecorder(size, args.output_file or 'frames', args.fps_video)
+    else:
+        # A memory-mapped field is streamed out a block at a time, like it is swept
+        writer = heat_output.VTSSeriesWriter(size, extent=extent,
+                                             block_rows=args.block_rows if args.storage == 'memmap' else None)
+    async_writer = None
+    if args.storage == 'memmap':
+        in_ram = [name for name, used in (("--output frames", args.output == 'frames'),
+                                          ("--async-queue", args.async_queue > 0),
+                                          ("--change-threshold", args.change_threshold)) if used]
+        if in_ram:
+            print(f"Warning: {', '.join(in_ram)} {'keeps' if len(in_ram) == 1 else 'keep'} full-size copies "
+                  f"of the field in RAM, so --storage memmap no longer bounds memory")
+    if args.async_queue > 0:
+        writer = async_writer = heat_output.AsyncWriter(writer, args.async_queue, args.backpressure)
+    if args.decimate > 1:
+        writer = heat_output.DecimatingWriter(writer, args.decimate)
+    return writer, async_writer
+
+def snapshot_schedule(args):
+    """The SnapshotSchedule for the --every/--log-spaced/--interval/--change-threshold options."""
+    policies = []
+    if args.every:
+        policies.append(heat_output.EveryNSteps(args.every))
+    if args.log_spaced:
+        policies.append(heat_output.LogSpaced(args.log_spaced))
+    if args.interval:
+        policies.append(heat_output.WallClockInterval(args.interval))
+    if args.change_threshold:
+        policies.append(heat_output.ChangeThreshold(args.change_threshold))
+    return heat_output.SnapshotSchedule(policies)
 
 if __name__ == '__main__':
-    sim = HeatDistributionSimulation()
-    num_timesteps = 1500
-    for timestep in range(num_timesteps):
-        sim.iterate()
-        save_to_vtk(sim, timestep)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Simulate heat distribution in a plate and write VTK output")
+    parser.add_argument('--grid-size', type=int, default=90)
+    parser.add_argument('--steps', type=int, default=1500)
+    parser.add_argument('--engine', choices=HeatDistributionSimulation.ENGINES, default='numpy')
+    parser.add_argument('--workers', type=int, help="threads for the 'threads' engine (default: all cores)")
+    parser.add_argument('--storage', choices=HeatDistributionSimulation.STORAGES, default='ram',
+                        help="keep the field in RAM, or in memory-mapped scratch files for grids that don't fit")
+    parser.add_argument('--geometry', metavar='JSON',
+                        help="plate layout file with fixed-temperature regions (rectangles, circles, polygons, "
+                             "image masks) and fixed, ramped or insulated edges")
+    parser.add_argument('--precision', choices=HeatDistributionSimulation.PRECISIONS,
+                        help="field precision (default float64); mixed sweeps in float32 and checks "
+                             "convergence on the float64 residual")
+    parser.add_argument('--scratch-dir', help="directory of the memmap scratch files (default: system temp)")
+    parser.add_argument('--block-rows', type=int, default=256, help="rows per block of the memmap sweep")
+    parser.add_argument('--output', choices=('vts', 'hdf5', 'frames'), default='vts',
+                        help="one .vts file per step, every step in a single VTKHDF file, "
+                             "or rendered frames (offscreen, no display needed)")
+    parser.add_argument('--output-file',
+                        help="VTKHDF file (default heat_simulation.vtkhdf), or for frames a directory "
+                             "of PNGs (default frames) or a video file such as heat_simulation.mp4")
+    parser.add_argument('--fps-video', type=float, default=30, help="frame rate of recorded video")
+    parser.add_argument('--every', type=int, help="save every N steps")
+    parser.add_argument('--log-spaced', type=int, metavar='PER_DECADE',
+                        help="save log-spaced steps, this many per factor of ten")
+    parser.add_argument('--interval', type=float, metavar='SECONDS', help="save at most this often in wall-clock time")
+    parser.add_argument('--change-threshold', type=float, metavar='DEGREES',
+                        help="save once the field moved this much since the last saved frame")
+    parser.add_argument('--decimate', type=int, default=1,
+                        help="keep every N-th row and column in the output, for previews")
+    parser.add_argument('--async-queue', type=int, default=0,
+                        help="write snapshots on a background thread with this many pending at most")
+    parser.add_argument('--backpressure', choices=heat_output.AsyncWriter.POLICIES, default='block',
+                        help="what to do with a new snapshot when the async queue is full")
+    parser.add_argument('--solver', choices=tuple(heat_solvers.SOLVERS),
+                        help="solve for the steady state and write a single VTK file instead of every step")
+    parser.add_argument('--tolerance', type=float, default=0.01)
+    parser.add_argument('--max-iterations', type=int, default=10000)
+    parser.add_argument('--until-converged', action='store_true',
+                        help="stop stepping once the convergence measure drops below --tolerance")
+    parser.add_argument('--check-every', type=int, default=1, metavar='K',
+                        help="only measure convergence every K steps; the other steps skip the reduction")
+    parser.add_argument('--norm', choices=heat_convergence.ConvergenceMonitor.NORMS, default='step',
+                        help="convergence measure: max change of a step, or the L-infinity/L2 residual")
+    parser.add_argument('--residual-history', metavar='CSV', help="write every convergence measurement to a CSV file")
+    parser.add_argument('--transient', choices=heat_transient.TransientSolver.SCHEMES,
+                        help="simulate real heat flow over --end-time seconds instead of relaxing; "
+                             "snapshots are tagged with their physical time")
+    parser.add_argument('--diffusivity', type=float, default=1e-4,
+                        help="thermal diffusivity in plate-length units^2 per second (the plate is 9 units wide)")
+    parser.add_argument('--dt', type=float, help="time step in seconds (default: the FTCS stability limit, "
+                                                 "or 10x that for the implicit schemes)")
+    parser.add_argument('--end-time', type=float, default=3600.0, help="simulated seconds of --transient")
+    parser.add_argument('--snapshot-time', type=float, default=60.0, metavar='SECONDS',
+                        help="simulated seconds between snapshots of --transient")
+    parser.add_argument('--error-tolerance', type=float, metavar='DEGREES',
+                        help="adapt the transient time step to keep the local error per step below this")
+    parser.add_argument('--volume', nargs='?', const='red-black', choices=heat_volume.VolumeHeatSimulation.SCHEMES,
+                        help="simulate a grid-size^3 block with a 7-point stencil and write compressed .vti "
+                             "volumes; 'red-black' (default) updates in place, 'jacobi' uses two buffers")
+    parser.add_argument('--view', nargs='?', const='timer', choices=('timer', 'threaded'),
+                        help="animate the simulation in a VTK window instead of writing files; "
+                             "'threaded' runs the solver on its own thread")
+    parser.add_argument('--fps', type=float, default=30, help="target frame rate of the threaded view")
+    parser.add_argument('--benchmark', choices=('engines', 'solvers', 'multigrid', 'scaling', 'precision'),
+                        help="run a benchmark instead of the simulation")
+    parser.add_argument('--checkpoint-every', type=int, metavar='N',
+                        help="write a checkpoint of the full simulation state every N steps")
+    parser.add_argument('--checkpoint-dir', default='checkpoints')
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from the latest checkpoint in --checkpoint-dir up to --steps")
+    parser.add_argument('--sweep', metavar='GRID_JSON',
+                        help="run every combination of a JSON parameter grid such as "
+                             "{\"grid_size\": [90, 180], \"source_temp\": [150, 212]} in a process pool")
+    parser.add_argument('--sweep-dir', default='sweep_results',
+                        help="results store of the sweep; finished cases in it are not run again")
+    parser.add_argument('--sweep-workers', type=int, help="worker processes of the sweep (default: all cores)")
+    parser.add_argument('--memory-limit', type=float, metavar='MB',
+                        help="memory each sweep case may allocate, on top of what its worker has mapped at start "
+                             "(Linux only)")
+    args = parser.parse_args()
+    geometry = None
+    if args.geometry:
+        with open(args.geometry) as f:
+            geometry = heat_geometry.PlateGeometry.from_spec(json.load(f))
+    sim_options = dict(engine=args.engine, workers=args.workers, storage=args.storage,
+                       scratch_dir=args.scratch_dir, block_rows=args.block_rows)
+    # Only passed when given, so a resumed run keeps its checkpoint's precision
+    if args.precision:
+        sim_options['precision'] = args.precision
+
+    if args.benchmark == 'engines':
+        heat_benchmarks.bench_engines(HeatDistributionSimulation)
+    elif args.benchmark == 'solvers':
+        heat_benchmarks.bench_solvers(HeatDistributionSimulation, tolerance=args.tolerance)
+    elif args.benchmark == 'multigrid':
+        heat_benchmarks.bench_multigrid(HeatDistributionSimulation, tolerance=args.tolerance)
+    elif args.benchmark == 'scaling':
+        heat_benchmarks.bench_scaling(HeatDistributionSimulation, args.grid_size, max_workers=args.workers)
+    elif args.benchmark == 'precision':
+        heat_benchmarks.bench_precision(HeatDistributionSimulation, tolerance=args.tolerance)
+    elif args.sweep:
+        with open(args.sweep) as f:
+            cases = heat_sweep.parameter_grid(json.load(f))
+        try:
+            heat_sweep.check_memory_limit(args.memory_limit)
+        except ValueError as error:
+            parser.error(str(error))
+        heat_sweep.run_sweep(HeatDistributionSimulation, cases, args.sweep_dir, args.sweep_workers,
+                             args.memory_limit, args.solver, args.tolerance, args.max_iterations)
+    elif args.transient:
+        sim = HeatDistributionSimulation(args.grid_size, geometry=geometry, **sim_options)
+        try:
+            solver = heat_transient.TransientSolver(sim, args.diffusivity, args.transient, args.dt,
+                                                    args.error_tolerance)
+        except ValueError as error:
+            parser.error(str(error))
+        writer, async_writer = snapshot_writer(args, sim.grid_size)
+        frames = max(int(np.ceil(args.end_time / args.snapshot_time)), 1)
+        with writer:
+            writer.write(sim.temperature, 0, solver.time)
+            for frame in range(1, frames + 1):
+                solver.advance(min(frame * args.snapshot_time, args.end_time))
+                writer.write(sim.temperature, frame, solver.time)
+        print(f"Simulated {solver.time:g} s in {solver.steps} steps of {solver.dt_range[0]:.4g} to "
+              f"{solver.dt_range[1]:.4g} s ({solver.rejected} rejected), stability limit {solver.stable_dt:.4g} s; "
+              f"saved {frames + 1} snapshots")
+        if async_writer is not None:
+            print(", ".join(f"{key}: {value:.4g}" for key, value in async_writer.stats().items()))
+    elif args.volume:
+        if args.norm != 'step':
+            parser.error("--volume only supports --norm step")
+        dtype = np.float64 if args.precision in (None, 'float64') else np.float32
+        sim = heat_volume.VolumeHeatSimulation(args.grid_size, args.volume, dtype=dtype)
+        monitor = heat_convergence.ConvergenceMonitor(args.tolerance, args.check_every)
+        schedule = snapshot_schedule(args)
+        saved = 0
+        with heat_output.VTISeriesWriter(sim.shape) as writer:
+            for timestep in range(args.steps):
+                converged = monitor.step(sim) and args.until_converged
+                if schedule.due(timestep, sim.temperature) or timestep == args.steps - 1 or converged:
+                    writer.write(sim.temperature, timestep)
+                    saved += 1
+                if converged:
+                    break
+        # No change is measured before the first check
+        change = f", max change {monitor.value:.4g}" if monitor.history else ""
+        print(f"Saved {saved} of {sim.iteration} steps{change}")
+    elif args.view:
+        sim = HeatDistributionSimulation(args.grid_size, geometry=geometry, **sim_options)
+        if args.view == 'threaded':
+            heat_viewer.create_threaded_visualization(sim, args.steps, args.fps)
+        else:
+            heat_viewer.create_vtk_visualization(sim, args.steps)
+    elif args.solver:
+        sim = HeatDistributionSimulation(args.grid_size, geometry=geometry, **sim_options)
+        try:
+            result = sim.solve(args.solver, args.tolerance, args.max_iterations)
+        except ValueError as error:
+            parser.error(str(error))
+        status = "Converged" if result.converged else "Stopped without converging"
+        print(f"{status} after {result.iterations} iterations with max change "
+              f"{result.max_change:.4g} in {result.wall_time:.3f}s ({result.method})")
+        save_to_vtk(sim, result.iterations, filename_template="heat_steady_state_{:03d}.vts")
+    else:
+        if args.resume:
+            sim = heat_checkpoint.load_checkpoint(HeatDistributionSimulation, args.checkpoint_dir, **sim_options)
+            print(f"Resuming at step {sim.iteration}")
+        else:
+            sim = HeatDistributionSimulation(args.grid_size, geometry=geometry, **sim_options)
+        checkpointer = heat_checkpoint.Checkpointer(args.checkpoint_dir, args.checkpoint_every)
+        monitor = heat_convergence.ConvergenceMonitor(args.tolerance, args.check_every, args.norm)
+
+        writer, async_writer = snapshot_writer(args, sim.grid_size)
+        schedule = snapshot_schedule(args)
+
+        saved = 0
+        with writer:
+            for timestep in range(sim.iteration, args.steps):
+                converged = monitor.step(sim) and args.until_converged
+                checkpointer.maybe_save(sim)
+                # The final state is always kept
+                if schedule.due(timestep, sim.temperature) or timestep == args.steps - 1 or converged:
+                    writer.write(sim.temperature, timestep)
+                    saved += 1
+                if converged:
+                    break
+        print(f"Saved {saved} of {sim.iteration} steps")
+        if args.until_converged and monitor.history:
+            if converged:
+                print(f"Converged at step {sim.iteration}, {args.norm} {monitor.value:.4g}")
+            else:
+                remaining = monitor.remaining()
+                estimate = f", about {remaining} more steps at the current rate" if remaining else ""
+                print(f"Not converged after {sim.iteration} steps, {args.norm} {monitor.value:.4g}{estimate}")
+        if args.residual_history:
+            monitor.save_history(args.residual_history)
+        if async_writer is not None:
+            print(", ".join(f"{key}: {value:.4g}" for key, value in async_writer.stats().items()))
@@ -0,0 +1,121 @@
+import os
+import time
+import tracemalloc
+import numpy as np
+
+
+def time_steps(sim, steps):
+    """Run `steps` iterations and return the mean wall time per step."""
+    start = time.perf_counter()
+    for _ in range(steps):
+        sim.iterate()
+    return (time.perf_counter() - start) / steps
+
+
+def bench_engines(sim_cls, sizes=(45, 90, 180, 360, 1000), steps=20, loop_steps=3, max_loop_size=360):
+    """Compare the per-cell loop engine against the vectorised numpy engine.
+
+    The loop engine is only timed up to `max_loop_size`, beyond that it takes
+    minutes per step. Where both run, the fields are checked for an exact match.
+    """
+    print(f"{'grid':>6} {'loop ms/step':>14} {'numpy ms/step':>14} {'speedup':>9} {'identical':>10}")
+    for size in sizes:
+        fast = sim_cls(size, engine='numpy')
+        numpy_time = time_steps(fast, steps)
+
+        if size > max_loop_size:
+            print(f"{size:>6} {'-':>14} {numpy_time * 1e3:>14.3f} {'-':>9} {'-':>10}")
+            continue
+
+        slow = sim_cls(size, engine='loop')
+        loop_time = time_steps(slow, loop_steps)
+
+        # Re-run the numpy engine for the same number of steps to compare fields
+        check = sim_cls(size, engine='numpy')
+        for _ in range(loop_steps):
+            check.iterate()
+        identical = np.array_equal(check.temperature, slow.temperature)
+
+        print(f"{size:>6} {loop_time * 1e3:>14.3f} {numpy_time * 1e3:>14.3f} "
+              f"{loop_time / numpy_time:>8.1f}x {str(identical):>10}")
+
+
+def bench_solvers(sim_cls, sizes=(45, 90, 180, 360), tolerance=0.01, max_iterations=200000,
+                  methods=('jacobi', 'gauss-seidel', 'sor')):
+    """Iterations and wall time to reach `tolerance` for each steady-state solver."""
+    print(f"{'grid':>6} {'method':>14} {'iterations':>11} {'seconds':>9} {'converged':>10}")
+    for size in sizes:
+        for method in methods:
+            result = sim_cls(size).solve(method, tolerance, max_iterations)
+            print(f"{size:>6} {method:>14} {result.iterations:>11} {result.wall_time:>9.3f} "
+                  f"{str(result.converged):>10}")
+
+
+def bench_multigrid(sim_cls, sizes=(129, 257, 513, 1025, 2049), tolerance=0.01, method='multigrid'):
+    """Time and peak memory per unknown of a multigrid solve; flat columns mean O(N)."""
+    print(f"{'grid':>6} {'unknowns':>10} {'cycles':>7} {'seconds':>9} {'us/unknown':>11} "
+          f"{'peak MB':>9} {'bytes/unknown':>14}")
+    for size in sizes:
+        sim = sim_cls(size)
+        unknowns = size * size
+
+        tracemalloc.start()
+        result = sim.solve(method, tolerance, 100)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{size:>6} {unknowns:>10} {result.iterations:>7} {result.wall_time:>9.3f} "
+              f"{result.wall_time / unknowns * 1e6:>11.3f} {peak / 2**20:>9.1f} {peak / unknowns:>14.1f}")
+
+
+def bench_scaling(sim_cls, grid_size=2000, steps=20, max_workers=None):
+    """Strong scaling of the threaded engine: one grid, 1 to N worker threads."""
+    max_workers = max_workers or os.cpu_count()
+    counts = sorted({1, *[2 ** k for k in range(1, max_workers.bit_length())], max_workers})
+    reference = sim_cls(grid_size, engine='numpy')
+    base = time_steps(reference, steps)
+    print(f"grid {grid_size}x{grid_size}, numpy engine {base * 1e3:.2f} ms/step")
+    print(f"{'workers':>8} {'ms/step':>9} {'speedup':>8} {'efficiency':>11} {'identical':>10}")
+
+    single = None
+    for workers in counts:
+        sim = sim_cls(grid_size, engine='threads', workers=workers)
+        elapsed = time_steps(sim, steps)
+        single = single or elapsed
+        identical = np.array_equal(sim.temperature, reference.temperature)
+        print(f"{workers:>8} {elapsed * 1e3:>9.2f} {single / elapsed:>7.2f}x "
+              f"{single / elapsed / workers:>10.0%} {str(identical):>10}")
+
+
+def bench_precision(sim_cls, sizes=(45, 90), tolerance=1e-4, max_iterations=100000, throughput_size=2000, steps=20,
+                    precisions=('float64', 'float32', 'mixed')):
+    """Throughput of each field precision, and how far its steady state drifts from float64.
+
+    Each precision steps the plate until its own max_change drops below
+    `tolerance`. float32 judges that from its rounded step differences and can
+    stop early or stall, mixed judges it from the float64 residual.
+    """
+    print(f"grid {throughput_size}x{throughput_size}, {steps} steps")
+    print(f"{'precision':>10} {'ms/step':>9} {'speedup':>8}")
+    base = None
+    for precision in precisions:
+        elapsed = time_steps(sim_cls(throughput_size, precision=precision), steps)
+        base = base or elapsed
+        print(f"{precision:>10} {elapsed * 1e3:>9.2f} {base / elapsed:>7.2f}x")
+
+    print(f"\nsteady state to tolerance {tolerance:g}")
+    print(f"{'grid':>6} {'precision':>10} {'iterations':>11} {'converged':>10} {'max drift':>10} {'rms drift':>10}")
+    for size in sizes:
+        reference = None
+        for precision in precisions:
+            sim = sim_cls(size, precision=precision)
+            converged = False
+            while sim.iteration < max_iterations:
+                if sim.iterate() < tolerance:
+                    converged = True
+                    break
+            field = sim.temperature.astype(np.float64)
+            reference = field if reference is None else reference
+            drift = field - reference
+            print(f"{size:>6} {precision:>10} {sim.iteration:>11} {str(converged):>10} "
+                  f"{np.abs(drift).max():>10.3g} {np.sqrt(np.mean(drift ** 2)):>10.3g}")
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+
+import heat_stencil
+
+
+class ConvergenceMonitor:
+    """Steps a simulation and decides when it has converged.
+
+    The stopping measure is only computed every `every` steps, the others are
+    plain sweeps. `norm` picks the measure:
+
+    - "step": max change of the sweep, reduced block by block inside it
+    - "linf": largest residual of the field after the sweep
+    - "l2": root mean square residual over the free cells
+
+    Every measurement is kept in `history` as (iteration, value) for plotting,
+    and the last few give the convergence rate used by `remaining()`.
+    """
+
+    NORMS = ('step', 'linf', 'l2')
+
+    def __init__(self, tolerance=0.01, every=1, norm='step', fit_points=5):
+        if norm not in self.NORMS:
+            raise ValueError(f"Unknown norm '{norm}', expected one of {self.NORMS}")
+        self.tolerance = tolerance
+        self.every = max(int(every), 1)
+        self.norm = norm
+        self.fit_points = fit_points
+        self.history = []
+
+    def step(self, sim):
+        """Advance `sim` one sweep; returns True once the measure is below tolerance."""
+        check = (sim.iteration + 1) % self.every == 0
+        if self.norm == 'step':
+            value = sim.iterate(check)
+        else:
+            sim.iterate(False)
+            value = heat_stencil.residual_norm(sim.temperature, sim.fixed_mask, self.norm) if check else None
+        if value is None:
+            return False
+        self.history.append((sim.iteration, float(value)))
+        return value < self.tolerance
+
+    def run(self, sim, max_iterations):
+        """Step until converged or `max_iterations` in total; returns whether it converged."""
+        while sim.iteration < max_iterations:
+            if self.step(sim):
+                return True
+        return False
+
+    @property
+    def value(self):
+        return self.history[-1][1] if self.history else None
+
+    def rate(self):
+        """Per-iteration contraction factor, from a log-linear fit of the last measurements."""
+        points = [(it, v) for it, v in self.history[-self.fit_points:] if v > 0]
+        if len(points) < 2:
+            return None
+        iterations, values = np.array(points).T
+        slope = np.polyfit(iterations, np.log(values), 1)[0]
+        return math.exp(slope)
+
+    def remaining(self):
+        """Estimated iterations left until the tolerance is reached, None while unknown or diverging."""
+        rate = self.rate()
+        if rate is None or rate >= 1:
+            return None
+        if self.value < self.tolerance:
+            return 0
+        return math.ceil(math.log(self.tolerance / self.value) / math.log(rate))
+
+    def save_history(self, filename):
+        """Write the measurements as iteration,value CSV."""
+        np.savetxt(filename, np.array(self.history).reshape(-1, 2), fmt=['%d', '%.10g'], delimiter=',',
+                   header=f"iteration,{self.norm}", comments='')
@@ -0,0 +1,254 @@
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+
+EDGES = ('left', 'right', 'top', 'bottom')
+
+
+def _cell_coords(grid_size, start, stop):
+    # Cell centres of rows start..stop in plate units, 0..1 along each axis;
+    # x follows the first index and y the second, as in the VTK output
+    axis = np.arange(grid_size) / (grid_size - 1)
+    return axis[start:stop, None], axis[None, :]
+
+
+class CellBox:
+    """Cells i0 <= i < i1, j0 <= j < j1, by index."""
+
+    def __init__(self, i0, i1, j0, j1):
+        self.bounds = (i0, i1, j0, j1)
+
+    def mask(self, grid_size, start=0, stop=None):
+        stop = grid_size if stop is None else stop
+        i0, i1, j0, j1 = self.bounds
+        mask = np.zeros((stop - start, grid_size), dtype=bool)
+        mask[max(i0, start) - start:max(min(i1, stop), start) - start, j0:j1] = True
+        return mask
+
+    def spec(self):
+        return {'cells': list(self.bounds)}
+
+
+class Rectangle:
+    """Cells whose centre lies in [x0, x1] x [y0, y1], in plate units (0..1)."""
+
+    def __init__(self, x0, y0, x1, y1):
+        self.bounds = (x0, y0, x1, y1)
+
+    def mask(self, grid_size, start=0, stop=None):
+        x, y = _cell_coords(grid_size, start, stop)
+        x0, y0, x1, y1 = self.bounds
+        return (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+    def spec(self):
+        return {'rectangle': list(self.bounds)}
+
+
+class Circle:
+    """Cells whose centre lies within `radius` of (cx, cy), in plate units."""
+
+    def __init__(self, cx, cy, radius):
+        self.centre = (cx, cy)
+        self.radius = radius
+
+    def mask(self, grid_size, start=0, stop=None):
+        x, y = _cell_coords(grid_size, start, stop)
+        cx, cy = self.centre
+        return (x - cx) ** 2 + (y - cy) ** 2 <= self.radius ** 2
+
+    def spec(self):
+        return {'circle': [*self.centre, self.radius]}
+
+
+class Polygon:
+    """Cells whose centre lies inside the polygon through `points`, in plate units.
+
+    Even-odd ray casting, vectorised over all cells one polygon edge at a time.
+    """
+
+    def __init__(self, points):
+        self.points = [tuple(p) for p in points]
+
+    def mask(self, grid_size, start=0, stop=None):
+        x, y = _cell_coords(grid_size, start, stop)
+        inside = np.zeros((x.shape[0], grid_size), dtype=bool)
+        for (xa, ya), (xb, yb) in zip(self.points, self.points[1:] + self.points[:1]):
+            if ya == yb:
+                continue
+            crosses = (ya > y) != (yb > y)
+            x_cross = xa + (y - ya) * (xb - xa) / (yb - ya)
+            inside ^= crosses & (x < x_cross)
+        return inside
+
+    def spec(self):
+        return {'polygon': [list(p) for p in self.points]}
+
+
+class ImageMask:
+    """Cells under the bright pixels of an image, stretched over the whole plate.
+
+    `image` is a file VTK can read (PNG, JPEG, BMP, TIFF, ...) or a 2D array
+    indexed [row, column] with row 0 at the bottom. Pixels above `threshold`
+    (0..1 of the full range) belong to the region, or below it with `invert`.
+    """
+
+    def __init__(self, image, threshold=0.5, invert=False):
+        self.image = image
+        self.threshold = threshold
+        self.invert = invert
+        self._loaded = None
+
+    def _pixels(self):
+        # Read once, not again for every row block
+        if self._loaded is None:
+            self._loaded = self._read()
+        return self._loaded
+
+    def _read(self):
+        if not isinstance(self.image, str):
+            return np.asarray(self.image, dtype=float)
+        reader = vtk.vtkImageReader2Factory.CreateImageReader2(self.image)
+        if reader is None:
+            raise ValueError(f"Can't read image '{self.image}'")
+        reader.SetFileName(self.image)
+        reader.Update()
+        output = reader.GetOutput()
+        width, height, _ = output.GetDimensions()
+        scalars = numpy_support.vtk_to_numpy(output.GetPointData().GetScalars())
+        pixels = scalars.reshape(height, width, -1)[:, :, 0].astype(float)
+        if np.issubdtype(scalars.dtype, np.integer):
+            pixels /= np.iinfo(scalars.dtype).max
+        return pixels
+
+    def mask(self, grid_size, start=0, stop=None):
+        pixels = self._pixels()
+        # Nearest pixel to each cell: x runs along image columns, y along rows
+        columns = np.round(np.linspace(0, pixels.shape[1] - 1, grid_size)).astype(int)[start:stop]
+        rows = np.round(np.linspace(0, pixels.shape[0] - 1, grid_size)).astype(int)
+        mask = pixels[np.ix_(rows, columns)].T > self.threshold
+        return ~mask if self.invert else mask
+
+    def spec(self):
+        if not isinstance(self.image, str):
+            raise ValueError("Only image masks read from a file can be saved in a spec")
+        return {'image': self.image, 'threshold': self.threshold, 'invert': self.invert}
+
+
+SHAPES = {'cells': CellBox, 'rectangle': Rectangle, 'circle': Circle, 'polygon': Polygon}
+
+
+def shape_from_spec(spec):
+    if 'image' in spec:
+        return ImageMask(spec['image'], spec.get('threshold', 0.5), spec.get('invert', False))
+    for key, cls in SHAPES.items():
+        if key in spec:
+            return cls(spec[key]) if cls is Polygon else cls(*spec[key])
+    raise ValueError(f"Region needs one of {(*SHAPES, 'image')}, got {sorted(spec)}")
+
+
+class PlateGeometry:
+    """Fixed-temperature regions and edge conditions of a plate.
+
+    `regions` is a list of (shape, temperature) pairs. `edges` maps "left"
+    and "right" (first and last column), "top" and "bottom" (first and last
+    row) to a temperature, a (start, end) pair for a linear ramp along the
+    edge, or "insulated". An edge left out holds the plate's initial
+    temperature, so every border cell is fixed. Edges left out are applied
+    first, then the regions in order, then the given edges in EDGES order,
+    later ones winning where they overlap.
+    """
+
+    def __init__(self, regions=(), edges=None):
+        self.regions = list(regions)
+        self.edges = dict(edges or {})
+        for name in self.edges:
+            if name not in EDGES:
+                raise ValueError(f"Unknown edge '{name}', expected one of {EDGES}")
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Build from a JSON-style dict: {"regions": [{"circle": [cx, cy, r], "temperature": t}, ...],
+        "edges": {"left": 32, "top": [32, 100], "bottom": "insulated"}}."""
+        regions = [(shape_from_spec(region), region['temperature']) for region in spec.get('regions', [])]
+        edges = {name: tuple(value) if isinstance(value, list) else value
+                 for name, value in spec.get('edges', {}).items()}
+        return cls(regions, edges)
+
+    def spec(self):
+        return {'regions': [{**shape.spec(), 'temperature': temperature} for shape, temperature in self.regions],
+                'edges': {name: list(value) if isinstance(value, tuple) else value
+                          for name, value in self.edges.items()}}
+
+    def compile_into(self, temperature, fixed_mask, default_temp=70, block_rows=256):
+        """Write the plate into the n x n arrays `temperature` and `fixed_mask`, `block_rows` rows at a time.
+
+        `fixed_mask` marks every cell the stencil must not update; the other
+        cells start at `default_temp`. Only one block of rows is held in
+        memory, so the outputs can be memmaps larger than RAM. Returns
+        (neumann_index, neumann_source): the insulated edge cells, as flat
+        indices, and the cells one step inwards that they copy after every
+        sweep, which gives zero flux across the edge.
+        """
+        n = temperature.shape[0]
+        ramp = np.arange(n) / (n - 1)
+        neumann = []
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            values = np.full((stop - start, n), float(default_temp))
+            fixed = np.zeros((stop - start, n), dtype=bool)
+            insulated = np.zeros((stop - start, n), dtype=bool)
+            # The edge lines crossing this block, with the ramp position along each
+            lines = {'left': ((slice(None), 0), ramp[start:stop]), 'right': ((slice(None), -1), ramp[start:stop])}
+            if start == 0:
+                lines['top'] = ((0, slice(None)), ramp)
+            if stop == n:
+                lines['bottom'] = ((-1, slice(None)), ramp)
+
+            # A free border cell would be a different plate for the sweeps (never
+            # updated) and the direct solvers (0 degrees outside the plate)
+            for name, (line, _) in lines.items():
+                if name not in self.edges:
+                    fixed[line] = True
+
+            for shape, temperature_value in self.regions:
+                mask = shape.mask(n, start, stop)
+                values[mask] = temperature_value
+                fixed |= mask
+
+            for name in EDGES:
+                if name not in self.edges or name not in lines:
+                    continue
+                line, along = lines[name]
+                value = self.edges[name]
+                fixed[line] = True
+                if value == 'insulated':
+                    insulated[line] = True
+                    continue
+                insulated[line] = False
+                if isinstance(value, tuple):
+                    low, high = value
+                    values[line] = low + (high - low) * along
+                else:
+                    values[line] = value
+
+            # Insulated cells take their value from the interior after the sweep
+            values[insulated] = default_temp
+            temperature[start:stop] = values
+            fixed_mask[start:stop] = fixed
+            neumann.append(np.flatnonzero(insulated) + start * n)
+
+        neumann_index = np.concatenate(neumann)
+        # Clamping into the interior moves edge cells one step inwards, and
+        # corners diagonally inwards
+        rows, cols = np.unravel_index(neumann_index, (n, n))
+        neumann_source = np.ravel_multi_index((np.clip(rows, 1, n - 2), np.clip(cols, 1, n - 2)), (n, n))
+        return neumann_index, neumann_source
+
+
+def default_plate(grid_size, left_temp=32, right_temp=100, source_temp=212, source_bounds=None):
+    """The original plate: fixed left/right edges, ramped top/bottom edges and a square source."""
+    start, end = source_bounds or (grid_size // 3, 2 * grid_size // 3)
+    return PlateGeometry(
+        regions=[(CellBox(start, end, start, end), source_temp)],
+        edges={'left': left_temp, 'right': right_temp,
+               'top': (left_temp, right_temp), 'bottom': (left_temp, right_temp)})
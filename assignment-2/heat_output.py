@@ -0,0 +1,555 @@
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+
+try:
+    import h5py
+except ImportError:  # only needed for the HDF5 time-series backend
+    h5py = None
+
+
+class StructuredGridExporter:
+    """Writes temperature fields of one grid size to .vts files.
+
+    The points, the grid and the writer are built once. Each write casts the
+    field into a float32 buffer that the "Temperature" array wraps without
+    copying, so no per-point Python calls are made.
+    """
+
+    def __init__(self, grid_size, extent=9.0):
+        self.grid_size = grid_size
+
+        # Same point order and float32 points as before: x follows the first
+        # index, y the second
+        axis = extent * np.arange(grid_size) / (grid_size - 1)
+        self._coords = np.zeros((grid_size, grid_size, 3), dtype=np.float32)
+        self._coords[:, :, 0] = axis[:, None]
+        self._coords[:, :, 1] = axis[None, :]
+        self._coords = self._coords.reshape(-1, 3)
+        points = vtk.vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(self._coords))
+
+        self._values = np.empty(grid_size * grid_size, dtype=np.float32)
+        self.scalars = numpy_support.numpy_to_vtk(self._values)
+        self.scalars.SetName("Temperature")
+
+        self.grid = vtk.vtkStructuredGrid()
+        self.grid.SetDimensions(grid_size, grid_size, 1)
+        self.grid.SetPoints(points)
+        self.grid.GetPointData().SetScalars(self.scalars)
+
+        self.writer = vtk.vtkXMLStructuredGridWriter()
+        self.writer.SetInputData(self.grid)
+
+    def write(self, temperature, filename):
+        np.copyto(self._values, temperature.reshape(-1), casting='same_kind')
+        self.scalars.Modified()
+        self.writer.SetFileName(filename)
+        self.writer.Write()
+
+
+class StreamingStructuredGridExporter:
+    """Writes .vts files a block of rows at a time, for fields in memory-mapped storage.
+
+    VTK's writer needs the points and values of the whole grid in memory, so
+    this one writes the XML itself with the arrays appended as raw binary.
+    The temperatures are cast to float32 `block_rows` rows at a time and the
+    points of each block are generated as they are written, so RAM use is one
+    block. Points and values match StructuredGridExporter; the data is not
+    compressed.
+    """
+
+    def __init__(self, grid_size, extent=9.0, block_rows=256):
+        self.grid_size = grid_size
+        self.block_rows = block_rows
+        self._axis = (extent * np.arange(grid_size) / (grid_size - 1)).astype(np.float32)
+
+    def _header(self, value_bytes):
+        extent = f"0 {self.grid_size - 1} 0 {self.grid_size - 1} 0 0"
+        return (
+            '<?xml version="1.0"?>\n'
+            '<VTKFile type="StructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n'
+            f'  <StructuredGrid WholeExtent="{extent}">\n'
+            f'    <Piece Extent="{extent}">\n'
+            '      <PointData Scalars="Temperature">\n'
+            '        <DataArray type="Float32" Name="Temperature" format="appended" offset="0"/>\n'
+            '      </PointData>\n'
+            '      <Points>\n'
+            '        <DataArray type="Float32" Name="Points" NumberOfComponents="3" format="appended" '
+            f'offset="{8 + value_bytes}"/>\n'
+            '      </Points>\n'
+            '    </Piece>\n'
+            '  </StructuredGrid>\n'
+            '  <AppendedData encoding="raw">\n   _'
+        )
+
+    def write(self, temperature, filename):
+        n, rows = self.grid_size, self.block_rows
+        value_bytes = n * n * 4
+        with open(filename, 'wb') as f:
+            f.write(self._header(value_bytes).encode())
+            # Each array is preceded by its size in bytes
+            f.write(np.array(value_bytes, dtype='<u8').tobytes())
+            for start in range(0, n, rows):
+                f.write(np.ascontiguousarray(temperature[start:start + rows], dtype='<f4'))
+            f.write(np.array(3 * value_bytes, dtype='<u8').tobytes())
+            # x follows the first index of the field, y the second
+            points = np.zeros((min(rows, n), n, 3), dtype='<f4')
+            points[:, :, 1] = self._axis
+            for start in range(0, n, rows):
+                block = points[:min(rows, n - start)]
+                block[:, :, 0] = self._axis[start:start + len(block), None]
+                f.write(block)
+            f.write(b'\n  </AppendedData>\n</VTKFile>\n')
+
+
+_exporters = {}
+
+
+def vtk_exporter(grid_size, extent=9.0):
+    """The shared exporter for `grid_size`, so repeated saves reuse its geometry."""
+    key = (grid_size, extent)
+    if key not in _exporters:
+        _exporters[key] = StructuredGridExporter(grid_size, extent)
+    return _exporters[key]
+
+
+def write_pvd(filename, timeline):
+    """ParaView collection of (time, file) pairs, so the files play back at their physical times."""
+    with open(filename, 'w') as f:
+        f.write('<?xml version="1.0"?>\n<VTKFile type="Collection" version="0.1">\n  <Collection>\n')
+        for time, path in timeline:
+            f.write(f'    <DataSet timestep="{time:.10g}" part="0" file="{path}"/>\n')
+        f.write('  </Collection>\n</VTKFile>\n')
+
+
+class SeriesWriter:
+    """Writes each snapshot to its own file through `exporter`, named by `filename_template`.
+
+    Snapshots written with a physical `time` are also listed in a .pvd
+    collection next to them when the writer is closed.
+    """
+
+    def __init__(self, exporter, output_dir, filename_template):
+        os.makedirs(output_dir, exist_ok=True)
+        self.exporter = exporter
+        self.output_dir = output_dir
+        self.filename_template = filename_template
+        self._timeline = []
+
+    def write(self, temperature, step, time=None):
+        filename = self.filename_template.format(step)
+        self.exporter.write(temperature, os.path.join(self.output_dir, filename))
+        if time is not None:
+            self._timeline.append((time, filename))
+
+    def close(self):
+        if self._timeline:
+            write_pvd(os.path.join(self.output_dir, self.filename_template.split('{')[0].rstrip('_') + '.pvd'),
+                      self._timeline)
+            self._timeline = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class VTSSeriesWriter(SeriesWriter):
+    """One .vts file per snapshot, the original output layout.
+
+    With `block_rows` the files are streamed that many rows at a time, for
+    fields that live in memory-mapped storage.
+    """
+
+    def __init__(self, grid_size, output_dir="vtk_outpu_2", filename_template="heat_simulation_{:03d}.vts",
+                 extent=9.0, block_rows=None):
+        if block_rows:
+            exporter = StreamingStructuredGridExporter(grid_size, extent, block_rows)
+        else:
+            exporter = vtk_exporter(grid_size, extent)
+        super().__init__(exporter, output_dir, filename_template)
+
+
+class ImageDataExporter:
+    """Writes 3D temperature volumes to compressed .vti image files.
+
+    A uniform grid needs no stored points, only origin and spacing, so the
+    file holds just the float32 temperatures, zlib or lz4 compressed and
+    appended as raw binary. As in the plate exporter, x follows the first
+    index of the field.
+    """
+
+    def __init__(self, shape, extent=9.0, compressor='zlib'):
+        self.shape = tuple(shape)
+        # Cubic cells, the longest axis spans `extent`
+        spacing = extent / (max(self.shape) - 1)
+        self._values = np.empty(int(np.prod(self.shape)), dtype=np.float32)
+        # Fortran-order view so copying the field in puts x fastest, as VTK expects
+        self._volume = self._values.reshape(self.shape, order='F')
+        self.scalars = numpy_support.numpy_to_vtk(self._values)
+        self.scalars.SetName("Temperature")
+
+        self.image = vtk.vtkImageData()
+        self.image.SetDimensions(*self.shape)
+        self.image.SetSpacing(spacing, spacing, spacing)
+        self.image.GetPointData().SetScalars(self.scalars)
+
+        self.writer = vtk.vtkXMLImageDataWriter()
+        self.writer.SetInputData(self.image)
+        self.writer.SetDataModeToAppended()
+        self.writer.EncodeAppendedDataOff()
+        if compressor == 'lz4':
+            self.writer.SetCompressorTypeToLZ4()
+        else:
+            self.writer.SetCompressorTypeToZLib()
+
+    def write(self, temperature, filename):
+        np.copyto(self._volume, temperature, casting='same_kind')
+        self.scalars.Modified()
+        self.writer.SetFileName(filename)
+        self.writer.Write()
+
+
+class VTISeriesWriter(SeriesWriter):
+    """One compressed .vti file per snapshot of a volume simulation."""
+
+    def __init__(self, shape, output_dir="vtk_volume", filename_template="heat_volume_{:03d}.vti",
+                 extent=9.0, compressor='zlib'):
+        super().__init__(ImageDataExporter(shape, extent, compressor), output_dir, filename_template)
+
+
+class HDF5TimeSeriesWriter:
+    """Streams every snapshot into a single VTKHDF file that ParaView opens as a time series.
+
+    The image geometry is stored once as attributes and the temperature is
+    appended to one chunked, compressed dataset of shape (steps, ny, nx).
+    Step times go to Steps/Values. Each snapshot is written one chunk of rows
+    at a time, so a memory-mapped field is never copied whole into RAM.
+    """
+
+    def __init__(self, filename, grid_size, extent=9.0, dtype=np.float32, compression='gzip', compression_opts=4):
+        if h5py is None:
+            raise ImportError("the HDF5 output backend requires h5py")
+        self.grid_size = grid_size
+        self.file = h5py.File(filename, 'w')
+
+        root = self.file.create_group('VTKHDF')
+        root.attrs['Version'] = np.array([2, 1], dtype='i8')
+        root.attrs.create('Type', np.bytes_('ImageData'))
+        root.attrs['WholeExtent'] = np.array([0, grid_size - 1, 0, grid_size - 1, 0, 0], dtype='i8')
+        root.attrs['Origin'] = np.zeros(3)
+        spacing = extent / (grid_size - 1)
+        root.attrs['Spacing'] = np.array([spacing, spacing, 1.0])
+        root.attrs['Direction'] = np.eye(3).ravel()
+
+        point_data = root.create_group('PointData')
+        point_data.attrs.create('Scalars', np.bytes_('Temperature'))
+        # Chunks of whole rows, about 1 MB each, so one step reads a handful of chunks
+        self._rows = max(1, min(grid_size, 2**20 // (grid_size * np.dtype(dtype).itemsize)))
+        self.temperature = point_data.create_dataset(
+            'Temperature', shape=(0, grid_size, grid_size), maxshape=(None, grid_size, grid_size),
+            dtype=dtype, chunks=(1, self._rows, grid_size), compression=compression, compression_opts=compression_opts)
+
+        self.steps = root.create_group('Steps')
+        self.steps.attrs['NSteps'] = 0
+        self.times = self.steps.create_dataset('Values', shape=(0,), maxshape=(None,), dtype='f8', chunks=(1024,))
+        offsets = self.steps.create_group('PointDataOffsets')
+        self.offsets = offsets.create_dataset('Temperature', shape=(0,), maxshape=(None,), dtype='i8', chunks=(1024,))
+
+    def write(self, temperature, step, time=None):
+        n = self.temperature.shape[0]
+        self.temperature.resize(n + 1, axis=0)
+        # VTK images run x fastest; x follows the first index of the field, so
+        # a chunk of dataset rows is a strip of field columns
+        for start in range(0, self.grid_size, self._rows):
+            self.temperature[n, start:start + self._rows] = temperature[:, start:start + self._rows].T
+        self.times.resize((n + 1,))
+        self.times[n] = step if time is None else time
+        self.offsets.resize((n + 1,))
+        self.offsets[n] = n
+        self.steps.attrs['NSteps'] = n + 1
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HDF5TimeSeriesReader:
+    """Lazy access to a file written by HDF5TimeSeriesWriter; `reader[i]` loads only step i."""
+
+    def __init__(self, filename):
+        if h5py is None:
+            raise ImportError("reading HDF5 time series requires h5py")
+        self.file = h5py.File(filename, 'r')
+        self.temperature = self.file['VTKHDF/PointData/Temperature']
+        self.times = self.file['VTKHDF/Steps/Values'][:]
+
+    def __len__(self):
+        return self.temperature.shape[0]
+
+    def __getitem__(self, step):
+        # Back to the simulation's [x, y] layout
+        return self.temperature[step].T
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncWriter:
+    """Hands snapshots to another writer running on a background thread.
+
+    write() copies the field into a recycled snapshot buffer and returns, so the
+    solver keeps computing while the wrapped writer does the I/O. When
+    `max_queue` snapshots are pending the policy decides what happens:
+
+    - "block": wait for the writer thread to catch up (nothing is lost)
+    - "drop": discard the incoming snapshot
+    - "coalesce": overwrite the newest pending snapshot, so the latest state
+      is always written but intermediate ones may be skipped
+    """
+
+    POLICIES = ('block', 'drop', 'coalesce')
+
+    def __init__(self, writer, max_queue=4, policy='block'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown back-pressure policy '{policy}', expected one of {self.POLICIES}")
+        self.writer = writer
+        self.max_queue = max_queue
+        self.policy = policy
+
+        self._pending = deque()
+        self._free = []
+        self._cond = threading.Condition()
+        self._closing = False
+        self._error = None
+
+        # Counters, see stats()
+        self.written = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.blocked_time = 0.0
+        self.write_time = 0.0
+        self.max_write_latency = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="heat-output-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, temperature, step, time=None):
+        with self._cond:
+            self._raise_pending_error()
+            if len(self._pending) >= self.max_queue:
+                if self.policy == 'drop':
+                    self.dropped += 1
+                    return
+                if self.policy == 'coalesce':
+                    buffer, _, _ = self._pending[-1]
+                    np.copyto(buffer, temperature)
+                    self._pending[-1] = (buffer, step, time)
+                    self.coalesced += 1
+                    return
+                start = _now()
+                self._cond.wait_for(lambda: len(self._pending) < self.max_queue or self._error)
+                self.blocked_time += _now() - start
+                self._raise_pending_error()
+
+            buffer = self._free.pop() if self._free else np.empty_like(temperature)
+            np.copyto(buffer, temperature)
+            self._pending.append((buffer, step, time))
+            self.max_depth = max(self.max_depth, len(self._pending))
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                if not self._pending:
+                    return
+                buffer, step, time = self._pending.popleft()
+                self._cond.notify_all()
+
+            start = _now()
+            try:
+                self.writer.write(buffer, step, time)
+            except Exception as error:
+                with self._cond:
+                    self._error = error
+                    self._pending.clear()
+                    self._cond.notify_all()
+                return
+            latency = _now() - start
+
+            with self._cond:
+                self.written += 1
+                self.write_time += latency
+                self.max_write_latency = max(self.max_write_latency, latency)
+                self._free.append(buffer)
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            raise RuntimeError("background snapshot writer failed") from self._error
+
+    @property
+    def queue_depth(self):
+        return len(self._pending)
+
+    def stats(self):
+        """Counters for spotting an I/O bottleneck: a high blocked_time or drop count means the writer can't keep up."""
+        with self._cond:
+            return {
+                'written': self.written,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'queue_depth': len(self._pending),
+                'max_queue_depth': self.max_depth,
+                'blocked_time': self.blocked_time,
+                'mean_write_latency': self.write_time / self.written if self.written else 0.0,
+                'max_write_latency': self.max_write_latency,
+            }
+
+    def close(self):
+        """Flush everything still queued, then close the wrapped writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.writer.close()
+        self._raise_pending_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _now():
+    return time.perf_counter()
+
+
+class DecimatingWriter:
+    """Passes every `factor`-th row and column on to `writer`, for preview output.
+
+    Build the wrapped writer with decimated_grid(), the kept points start at
+    the origin and keep their physical spacing.
+    """
+
+    def __init__(self, writer, factor):
+        self.writer = writer
+        self.factor = factor
+
+    def write(self, temperature, step, time=None):
+        self.writer.write(temperature[::self.factor, ::self.factor], step, time)
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decimated_grid(grid_size, factor, extent=9.0):
+    """Size and physical extent of a grid_size field after keeping every `factor`-th point."""
+    size = len(range(0, grid_size, factor))
+    return size, extent * (size - 1) * factor / (grid_size - 1)
+
+
+class EveryNSteps:
+    def __init__(self, n):
+        self.n = n
+
+    def due(self, step, temperature):
+        return step % self.n == 0
+
+    def saved(self, step, temperature):
+        pass
+
+
+class LogSpaced:
+    """Dense snapshots early on when the field moves fast, sparser later: `per_decade` per factor of ten steps."""
+
+    def __init__(self, per_decade=10):
+        self.factor = 10 ** (1 / per_decade)
+        self._next = 1.0
+
+    def due(self, step, temperature):
+        return step + 1 >= self._next
+
+    def saved(self, step, temperature):
+        while self._next <= step + 1:
+            self._next *= self.factor
+
+
+class WallClockInterval:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self._last = -np.inf
+
+    def due(self, step, temperature):
+        return _now() - self._last >= self.seconds
+
+    def saved(self, step, temperature):
+        self._last = _now()
+
+
+class ChangeThreshold:
+    """Saves once some cell moved more than `threshold` degrees since the last saved frame."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self._last = None
+        self._diff = None
+
+    def due(self, step, temperature):
+        if self._last is None:
+            return True
+        np.subtract(temperature, self._last, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        return self._diff.max() > self.threshold
+
+    def saved(self, step, temperature):
+        if self._last is None:
+            self._last = np.empty_like(temperature)
+            self._diff = np.empty_like(temperature)
+        np.copyto(self._last, temperature)
+
+
+class SnapshotSchedule:
+    """Decides which steps are written: a step is saved when any policy asks for it.
+
+    With no policies every step is saved, like the original loop.
+    """
+
+    def __init__(self, policies=()):
+        self.policies = list(policies)
+
+    def due(self, step, temperature):
+        if not self.policies:
+            return True
+        due = any(policy.due(step, temperature) for policy in self.policies)
+        if due:
+            for policy in self.policies:
+                policy.saved(step, temperature)
+        return due
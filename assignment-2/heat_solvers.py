@@ -0,0 +1,475 @@
+import time
+import hashlib
+from collections import namedtuple
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+# What every steady-state solver reports back
+SolverResult = namedtuple('SolverResult', ['method', 'iterations', 'max_change', 'converged', 'wall_time'])
+
+
+def optimal_omega(grid_size):
+    """Relaxation factor for SOR on a square Dirichlet grid.
+
+    Uses the spectral radius of Jacobi for the 5-point Laplacian,
+    rho = cos(pi / (n - 1)), and omega = 2 / (1 + sqrt(1 - rho^2)).
+    """
+    rho = np.cos(np.pi / (grid_size - 1))
+    return 2.0 / (1.0 + np.sqrt(1.0 - rho * rho))
+
+
+def jacobi(sim, tolerance, max_iterations):
+    """Plain Jacobi sweeps through the simulation's own iterate()."""
+    max_change = np.inf
+    for iteration in range(1, max_iterations + 1):
+        max_change = sim.iterate()
+        if max_change < tolerance:
+            return iteration, max_change
+    return max_iterations, max_change
+
+
+def _red_black(sim, tolerance, max_iterations, omega):
+    T = sim.temperature
+    rows, cols = np.indices(T.shape)
+    free = ~sim.fixed_mask
+    red = (free & ((rows + cols) % 2 == 0))[1:-1, 1:-1]
+    black = (free & ((rows + cols) % 2 == 1))[1:-1, 1:-1]
+
+    nbr = np.empty((T.shape[0] - 2, T.shape[1] - 2))
+    delta = np.empty_like(nbr)
+
+    def relax(colour):
+        np.add(T[:-2, 1:-1], T[2:, 1:-1], out=nbr)
+        np.add(nbr, T[1:-1, :-2], out=nbr)
+        np.add(nbr, T[1:-1, 2:], out=nbr)
+        np.multiply(nbr, 0.25, out=nbr)
+        np.subtract(nbr, T[1:-1, 1:-1], out=delta)
+        np.multiply(delta, omega, out=delta)
+        np.multiply(delta, colour, out=delta)
+        T[1:-1, 1:-1] += delta
+        np.abs(delta, out=delta)
+        return delta.max()
+
+    # Insulated edges copy their inner neighbours after every half sweep, as
+    # iterate() does after every step
+    insulated = len(getattr(sim, 'neumann_index', ())) > 0
+
+    def half_sweep(colour):
+        change = relax(colour)
+        if insulated:
+            sim.apply_neumann(T)
+        return change
+
+    max_change = np.inf
+    for iteration in range(1, max_iterations + 1):
+        # Red cells only have black neighbours and vice versa, so each half
+        # sweep sees the freshest values, exactly like an in-place loop
+        max_change = max(half_sweep(red), half_sweep(black))
+        sim.iteration += 1
+        if max_change < tolerance:
+            return iteration, max_change
+    return max_iterations, max_change
+
+
+def gauss_seidel(sim, tolerance, max_iterations):
+    return _red_black(sim, tolerance, max_iterations, 1.0)
+
+
+def sor(sim, tolerance, max_iterations, omega=None):
+    if omega is None:
+        omega = optimal_omega(sim.grid_size)
+    return _red_black(sim, tolerance, max_iterations, omega)
+
+
+def _interpolation(fixed):
+    """Bilinear prolongation from the (n // 2 + 1)^2 coarse grid onto `fixed`'s grid.
+
+    Coarse node I sits on fine node 2I. Rows of fixed fine cells are zeroed so
+    corrections never touch them.
+    """
+    n = fixed.shape[0]
+    nc = n // 2 + 1
+    i = np.arange(n)
+    rows = np.concatenate([i, i[1::2]])
+    cols = np.concatenate([i // 2, i[1::2] // 2 + 1])
+    vals = np.concatenate([np.where(i % 2 == 0, 1.0, 0.5), np.full(len(i[1::2]), 0.5)])
+    p1 = sp.csr_matrix((vals, (rows, cols)), shape=(n, nc))
+    return sp.diags((~fixed).ravel().astype(float)) @ sp.kron(p1, p1, format='csr')
+
+
+def _prolong_rows(coarse, n):
+    """Bilinear prolongation along the first axis, (n // 2 + 1, m) -> (n, m)."""
+    fine = np.empty((n,) + coarse.shape[1:])
+    fine[0::2] = coarse[:len(range(0, n, 2))]
+    odd = len(range(1, n, 2))
+    np.add(coarse[:odd], coarse[1:odd + 1], out=fine[1::2])
+    fine[1::2] *= 0.5
+    return fine
+
+
+def _restrict_rows(fine, nc):
+    """Transpose of _prolong_rows, (n, m) -> (nc, m)."""
+    coarse = np.zeros((nc,) + fine.shape[1:])
+    coarse[:len(range(0, len(fine), 2))] += fine[0::2]
+    half = 0.5 * fine[1::2]
+    coarse[:len(half)] += half
+    coarse[1:len(half) + 1] += half
+    return coarse
+
+
+class _FineLevel:
+    """The original grid, relaxed with the red-black stencil on (4u - sum of neighbours) = f."""
+
+    def __init__(self, fixed):
+        self.fixed = fixed
+        rows, cols = np.indices(fixed.shape)
+        free = ~fixed
+        self.red = (free & ((rows + cols) % 2 == 0))[1:-1, 1:-1]
+        self.black = (free & ((rows + cols) % 2 == 1))[1:-1, 1:-1]
+        self.f = np.zeros(fixed.shape)
+        self.r = np.zeros(fixed.shape)
+        self.scratch = np.empty((fixed.shape[0] - 2, fixed.shape[1] - 2))
+        self.u = None  # the simulation's field, relaxed in place
+
+    def neighbour_sum(self, u):
+        s = self.scratch
+        np.add(u[:-2, 1:-1], u[2:, 1:-1], out=s)
+        np.add(s, u[1:-1, :-2], out=s)
+        np.add(s, u[1:-1, 2:], out=s)
+        return s
+
+    def smooth(self, u, sweeps, reverse=False):
+        colours = (self.black, self.red) if reverse else (self.red, self.black)
+        for _ in range(sweeps):
+            for colour in colours:
+                s = self.neighbour_sum(u)
+                s += self.f[1:-1, 1:-1]
+                s *= 0.25
+                np.copyto(u[1:-1, 1:-1], s, where=colour)
+
+    def residual(self, u):
+        s = self.neighbour_sum(u)
+        s -= 4.0 * u[1:-1, 1:-1]
+        s += self.f[1:-1, 1:-1]
+        self.r[1:-1, 1:-1] = s
+        self.r[self.fixed] = 0.0
+        return self.r
+
+    # The transfers to the first coarse level, P = (free rows) x bilinear, are
+    # applied matrix-free: as a sparse matrix P alone costs ~30 bytes per fine
+    # cell. P^T r skips the masking as residuals are zero on fixed cells.
+    def restrict(self, r):
+        nc = self.fixed.shape[0] // 2 + 1
+        return _restrict_rows(_restrict_rows(r, nc).T, nc).T.ravel()
+
+    def prolong(self, coarse_u):
+        n, nc = self.fixed.shape[0], self.fixed.shape[0] // 2 + 1
+        fine = _prolong_rows(_prolong_rows(coarse_u.reshape(nc, nc), n).T, n).T
+        fine[self.fixed] = 0.0
+        return fine
+
+    def operator(self, u):
+        """The masked 5-point operator M (4u - sum of neighbours) M with M the free cells, as a stencil."""
+        u = np.where(self.fixed, 0.0, u)
+        out = 4.0 * u
+        out[1:] -= u[:-1]
+        out[:-1] -= u[1:]
+        out[:, 1:] -= u[:, :-1]
+        out[:, :-1] -= u[:, 1:]
+        out[self.fixed] = 0.0
+        return out
+
+    def galerkin(self):
+        """The first coarse operator P^T A P, from nine products of P, A and P^T with probe vectors.
+
+        A_c is 9-point, so coarse nodes three apart in both directions share
+        no row: probing with every such class at once gives one entry per row.
+        All weights are small dyadic numbers, so the entries are exact, like
+        the sparse product's.
+        """
+        nc = self.fixed.shape[0] // 2 + 1
+        index = np.arange(nc)
+        # values[I, k]: entry of row I at the k-th of the ascending 9-point offsets
+        values = np.zeros((nc, nc, 9))
+        for ci in range(3):
+            for cj in range(3):
+                probe = np.zeros((nc, nc))
+                probe[ci::3, cj::3] = 1.0
+                # Each row meets the class once, at the neighbour (di, dj) away
+                di = (ci - index + 1) % 3 - 1
+                dj = (cj - index + 1) % 3 - 1
+                slot = 3 * (di[:, None] + 1) + (dj[None, :] + 1)
+                values[index[:, None], index[None, :], slot] = \
+                    self.restrict(self.operator(self.prolong(probe))).reshape(nc, nc)
+
+        values = values.reshape(nc * nc, 9)
+        present = values != 0.0
+        index_dtype = np.int32 if nc * nc < 2**31 - nc else np.int64
+        offsets = np.array([di * nc + dj for di in (-1, 0, 1) for dj in (-1, 0, 1)], dtype=index_dtype)
+        columns = np.arange(nc * nc, dtype=index_dtype)[:, None] + offsets
+        indptr = np.zeros(nc * nc + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+        return sp.csr_matrix((values[present], columns[present], indptr), shape=(nc * nc, nc * nc))
+
+
+class _CoarseLevel:
+    """A Galerkin coarse level, A_c = P^T A P, relaxed with four-colour Gauss-Seidel.
+
+    Rediscretising on the coarse grid puts the edges of the source block and of
+    odd-sized plates in the wrong place, which stalls the V-cycle on large grids.
+    The Galerkin operator sees the fine geometry exactly.
+    """
+
+    def __init__(self, A, n):
+        diag = A.diagonal()
+        self.inert = diag == 0.0  # coarse nodes that only touch fixed fine cells
+        self.diag = np.where(self.inert, 1.0, diag)
+        self.u = np.zeros(A.shape[0])
+        self.f = np.zeros(A.shape[0])
+
+        # Galerkin operators are 9-point, so parity in both directions separates the colours.
+        # The colours' rows are all that is kept of A: inert rows are empty
+        rows, cols = np.indices((n, n))
+        colour = ((rows % 2) * 2 + cols % 2).ravel()
+        self.colours = []
+        for c in range(4):
+            idx = np.flatnonzero((colour == c) & ~self.inert)
+            self.colours.append((idx, A[idx], self.diag[idx]))
+
+    def smooth(self, sweeps, reverse=False):
+        colours = self.colours[::-1] if reverse else self.colours
+        for _ in range(sweeps):
+            for idx, rows, diag in colours:
+                self.u[idx] += (self.f[idx] - rows @ self.u) / diag
+
+    def residual(self):
+        r = self.f.copy()
+        for idx, rows, _ in self.colours:
+            r[idx] -= rows @ self.u
+        return r
+
+
+class _CoarsestLevel(_CoarseLevel):
+    """Solved exactly. A pseudo-inverse because odd geometries can make A_c singular."""
+
+    def __init__(self, A, n):
+        super().__init__(A, n)
+        self.active = np.flatnonzero(~self.inert)
+        self.inverse = np.linalg.pinv(A[self.active][:, self.active].toarray())
+
+    def smooth(self, sweeps, reverse=False):
+        self.u[self.active] = self.inverse @ self.f[self.active]
+
+
+def _build_levels(fixed, coarsest_size=9):
+    # No fine-grid matrix is built: the finest level transfers and forms the
+    # first Galerkin operator matrix-free, so its prolongation slot is None
+    levels = [_FineLevel(fixed)]
+    prolongations = [None]
+    A = levels[0].galerkin()
+    n = fixed.shape[0] // 2 + 1
+    while n > coarsest_size:
+        levels.append(_CoarseLevel(A, n))
+        # Coarse levels keep fixed cells out through A itself (inert rows)
+        P = _interpolation(np.zeros((n, n), dtype=bool))
+        A = (P.T @ A @ P).tocsr()
+        n = n // 2 + 1
+        prolongations.append(P)
+    levels.append(_CoarsestLevel(A, n))
+    return levels, prolongations
+
+
+def _cycle(levels, prolongations, k, gamma, pre_sweeps=2, post_sweeps=2):
+    level = levels[k]
+    coarse = levels[k + 1]
+    P = prolongations[k]
+
+    if k == 0:
+        u = level.u
+        level.smooth(u, pre_sweeps)
+        coarse.f[:] = level.restrict(level.residual(u))
+    else:
+        level.smooth(pre_sweeps)
+        coarse.f[:] = P.T @ level.residual()
+
+    coarse.u.fill(0.0)
+    if k + 1 == len(levels) - 1:
+        coarse.smooth(1)
+    else:
+        for _ in range(gamma):
+            _cycle(levels, prolongations, k + 1, gamma, pre_sweeps, post_sweeps)
+
+    # Post-smoothing runs the colours backwards so the cycle is symmetric and
+    # can precondition CG
+    if k == 0:
+        u += level.prolong(coarse.u)
+        level.smooth(u, post_sweeps, reverse=True)
+    else:
+        level.u += P @ coarse.u
+        level.smooth(post_sweeps, reverse=True)
+
+
+def _multigrid(sim, tolerance, max_iterations, gamma):
+    levels, prolongations = _build_levels(sim.fixed_mask)
+    finest = levels[0]
+    finest.u = sim.temperature
+
+    max_change = np.inf
+    cycle = 0
+    for cycle in range(1, max_iterations + 1):
+        _cycle(levels, prolongations, 0, gamma)
+        sim.iteration += 1
+        # A quarter of the residual is exactly what one Jacobi sweep would
+        # change, so the tolerance means the same thing as for iterate()
+        max_change = 0.25 * np.abs(finest.residual(sim.temperature)).max()
+        if max_change < tolerance:
+            break
+    return cycle, max_change
+
+
+def multigrid_v(sim, tolerance, max_iterations):
+    return _multigrid(sim, tolerance, max_iterations, gamma=1)
+
+
+def multigrid_w(sim, tolerance, max_iterations):
+    return _multigrid(sim, tolerance, max_iterations, gamma=2)
+
+
+class _FreeCellSystem:
+    """The 5-point Laplacian on the free cells only, with the fixed cells eliminated.
+
+    A x = B t_fixed, where A = 4I - (free-free adjacency) and B is the
+    free-fixed adjacency, so changing the fixed temperatures only changes the
+    right hand side. The LU factors and the multigrid preconditioner are built
+    on first use.
+    """
+
+    def __init__(self, fixed):
+        n = fixed.shape[0]
+        ones = np.ones(n * n)
+        horizontal = ones.copy()
+        horizontal[n - 1::n] = 0.0  # no coupling across the end of a row
+        adjacency = sp.diags([horizontal[:-1], horizontal[:-1], ones[:-n], ones[:-n]],
+                             [1, -1, n, -n], format='csr')
+
+        self.free = np.flatnonzero(~fixed.ravel())
+        self.fixed = np.flatnonzero(fixed.ravel())
+        rows = adjacency[self.free]
+        self.A = (4.0 * sp.identity(len(self.free), format='csr') - rows[:, self.free]).tocsc()
+        self.B = rows[:, self.fixed].tocsr()
+        self.mask = fixed.copy()
+        self._lu = None
+        self._preconditioner = None
+
+    @property
+    def lu(self):
+        if self._lu is None:
+            self._lu = spla.splu(self.A)
+        return self._lu
+
+    @property
+    def preconditioner(self):
+        # One symmetric V-cycle on A e = r, starting from e = 0
+        if self._preconditioner is None:
+            levels, prolongations = _build_levels(self.mask)
+            finest = levels[0]
+            finest.u = np.zeros(self.mask.shape)
+
+            def v_cycle(r):
+                finest.f.ravel()[self.free] = r
+                finest.u.fill(0.0)
+                _cycle(levels, prolongations, 0, gamma=1)
+                return finest.u.ravel()[self.free]
+
+            self._preconditioner = spla.LinearOperator(self.A.shape, v_cycle)
+        return self._preconditioner
+
+    def rhs(self, temperature):
+        return self.B @ temperature.ravel()[self.fixed]
+
+
+# Keyed by (grid shape, hash of the fixed-cell mask); runs that only change
+# boundary or source temperatures reuse the factorisation. Least recently used
+# first: a factorisation can be far bigger than the field, so only the last
+# MAX_CACHED_SYSTEMS plates are kept, e.g. across the cases of a sweep worker
+_systems = {}
+MAX_CACHED_SYSTEMS = 2
+
+
+def free_cell_system(fixed):
+    """The shared _FreeCellSystem of the plate whose fixed cells are `fixed`."""
+    key = (fixed.shape, hashlib.sha1(np.packbits(fixed)).hexdigest())
+    system = _systems.pop(key, None)
+    if system is None:
+        while len(_systems) >= MAX_CACHED_SYSTEMS:
+            # Dropped before the new one is built, so the two never coexist
+            del _systems[next(iter(_systems))]
+        system = _FreeCellSystem(fixed)
+    _systems[key] = system
+    return system
+
+
+def _jacobi_change(system, x, b):
+    # What one Jacobi sweep would still change, to report like the other solvers
+    return 0.25 * np.abs(b - system.A @ x).max() if len(x) else 0.0
+
+
+def sparse_lu(sim, tolerance, max_iterations):
+    """Direct solve; after the first call for a geometry it is a back-substitution."""
+    system = free_cell_system(sim.fixed_mask)
+    b = system.rhs(sim.temperature)
+    x = system.lu.solve(b)
+    sim.temperature.ravel()[system.free] = x
+    sim.iteration += 1
+    return 1, _jacobi_change(system, x, b)
+
+
+def sparse_cg(sim, tolerance, max_iterations):
+    """Multigrid-preconditioned conjugate gradients, started from the current field."""
+    system = free_cell_system(sim.fixed_mask)
+    b = system.rhs(sim.temperature)
+    x0 = sim.temperature.ravel()[system.free]
+
+    iterations = 0
+
+    def count(xk):
+        nonlocal iterations
+        iterations += 1
+
+    # ||r||_2 >= max|r|, so this guarantees the Jacobi-change tolerance
+    x, _ = spla.cg(system.A, b, x0=x0, rtol=0.0, atol=4.0 * tolerance, maxiter=max_iterations,
+                   M=system.preconditioner, callback=count)
+    sim.temperature.ravel()[system.free] = x
+    sim.iteration += iterations
+    return iterations, _jacobi_change(system, x, b)
+
+
+# Solvers are looked up by name, new ones only need to be added here
+SOLVERS = {
+    'jacobi': jacobi,
+    'gauss-seidel': gauss_seidel,
+    'sor': sor,
+    'multigrid': multigrid_v,
+    'multigrid-w': multigrid_w,
+    'sparse-lu': sparse_lu,
+    'sparse-cg': sparse_cg,
+}
+
+# The solvers that sweep the plate's own stencil and so can update insulated
+# edges as they go; the others solve for the fixed-temperature plate only
+INSULATED_EDGE_SOLVERS = ('jacobi', 'gauss-seidel', 'sor')
+
+
+def solve(sim, method='sor', tolerance=0.01, max_iterations=10000):
+    """Relax `sim` in place until the largest per-sweep change drops below `tolerance`."""
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown solver '{method}', expected one of {tuple(SOLVERS)}")
+    if len(getattr(sim, 'neumann_index', ())) and method not in INSULATED_EDGE_SOLVERS:
+        raise ValueError(f"Solver '{method}' only supports fixed-temperature edges, "
+                         f"use one of {INSULATED_EDGE_SOLVERS} for plates with insulated edges")
+
+    start = time.perf_counter()
+    iterations, max_change = SOLVERS[method](sim, tolerance, max_iterations)
+    wall_time = time.perf_counter() - start
+    return SolverResult(method, iterations, max_change, max_change < tolerance, wall_time)
@@ -0,0 +1,177 @@
+import os
+import json
+import hashlib
+import itertools
+import resource
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+import heat_convergence
+
+
+def parameter_grid(spec):
+    """Every combination of a {name: [values]} spec, as a list of keyword dicts.
+
+    Scalars are treated as a single value, so {"grid_size": 90, "source_temp": [150, 212]}
+    gives two cases.
+    """
+    names = sorted(spec)
+    values = [spec[name] if isinstance(spec[name], list) else [spec[name]] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def run_settings(method=None, tolerance=0.01, max_iterations=10000):
+    """How a case is run, which is part of its identity next to the plate parameters."""
+    return {'method': method, 'tolerance': tolerance, 'max_iterations': max_iterations}
+
+
+def case_id(params, settings=None):
+    """Stable name of a case, the same for equal parameters and run settings in any key order."""
+    text = json.dumps([params, settings or run_settings()], sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def _atomic_save(path, **arrays):
+    # Written under a temporary name and renamed, so a killed run never leaves
+    # a truncated file that a resume would take for a finished case
+    tmp = path + '.tmp.npz'
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def _mapped_bytes():
+    # Total virtual size of this process (VmSize), Linux only
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[0]) * resource.getpagesize()
+
+
+def _limit_memory(limit_mb):
+    # A worker starts out with everything its parent had mapped (numpy, scipy,
+    # vtk: hundreds of MB of address space), so the budget goes on top of that
+    if limit_mb:
+        limit = _mapped_bytes() + int(limit_mb * 2**20)
+        hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def check_memory_limit(limit_mb):
+    """Raise ValueError if `limit_mb` can't be used as the per-case memory budget."""
+    if limit_mb is not None:
+        if limit_mb <= 0:
+            raise ValueError("the memory limit must be a positive number of MB")
+        if not os.path.exists('/proc/self/statm'):
+            raise ValueError("the memory limit is only supported on Linux")
+
+
+def run_case(sim_cls, params, path, method=None, tolerance=0.01, max_iterations=10000):
+    """Run one case to convergence and save its field and history to `path`.
+
+    Without a `method` the plate is stepped with `iterate()` and the max change
+    of every step is kept. With a steady-state solver only its final max change
+    is known, so the history has a single entry.
+    """
+    sim = sim_cls(**params)
+    if method:
+        result = sim.solve(method, tolerance, max_iterations)
+        history = [result.max_change]
+        iterations, converged = result.iterations, result.converged
+    else:
+        monitor = heat_convergence.ConvergenceMonitor(tolerance)
+        converged = monitor.run(sim, max_iterations)
+        history = [value for _, value in monitor.history]
+        iterations = sim.iteration
+
+    settings = run_settings(method, tolerance, max_iterations)
+    _atomic_save(path, temperature=sim.temperature, history=np.asarray(history),
+                 iterations=iterations, converged=converged, params=json.dumps(params, sort_keys=True),
+                 settings=json.dumps(settings, sort_keys=True))
+    return {'iterations': int(iterations), 'converged': bool(converged), 'max_change': float(history[-1])}
+
+
+def _run_case_safely(sim_cls, params, path, method, tolerance, max_iterations):
+    # Exceptions, including MemoryError from the worker's address-space cap,
+    # become a failed entry instead of taking the whole sweep down
+    try:
+        return run_case(sim_cls, params, path, method, tolerance, max_iterations)
+    except BaseException as exc:
+        return {'error': f"{type(exc).__name__}: {exc}", 'traceback': traceback.format_exc()}
+
+
+class SweepStore:
+    """A directory holding one .npz per finished case and an index.json of summaries.
+
+    Case files are named by `case_id` of the plate parameters and the run
+    `settings` (solver method, tolerance, iteration cap), so the store can be
+    reopened by a later run: finished cases are found on disk and failed ones
+    are tried again, while a run with other settings gets cases of its own.
+    """
+
+    def __init__(self, directory, settings=None):
+        self.directory = directory
+        self.settings = settings or run_settings()
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, 'index.json')
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def case_id(self, params):
+        return case_id(params, self.settings)
+
+    def path(self, params):
+        return os.path.join(self.directory, self.case_id(params) + '.npz')
+
+    def is_done(self, params):
+        entry = self.index.get(self.case_id(params))
+        return entry is not None and 'error' not in entry and os.path.exists(self.path(params))
+
+    def record(self, params, summary):
+        self.index[self.case_id(params)] = {'params': params, 'settings': self.settings, **summary}
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def load(self, params):
+        """The saved arrays of a finished case."""
+        with np.load(self.path(params)) as data:
+            return {key: data[key] for key in data.files}
+
+
+def run_sweep(sim_cls, cases, directory='sweep_results', workers=None, memory_limit_mb=None,
+              method=None, tolerance=0.01, max_iterations=10000):
+    """Run every case in a process pool, skipping those already finished in `directory`.
+
+    `memory_limit_mb` is the memory each case may allocate: every worker's
+    address space is capped at what it has mapped when it starts plus this
+    many MB (Linux only). A case that exceeds it fails with MemoryError and is
+    recorded as failed. Returns the store so results can be read back.
+    """
+    check_memory_limit(memory_limit_mb)
+    store = SweepStore(directory, run_settings(method, tolerance, max_iterations))
+    pending = [params for params in cases if not store.is_done(params)]
+    print(f"{len(cases)} cases, {len(cases) - len(pending)} already done, {len(pending)} to run")
+
+    failed = 0
+    with ProcessPoolExecutor(workers, initializer=_limit_memory, initargs=(memory_limit_mb,)) as pool:
+        futures = {pool.submit(_run_case_safely, sim_cls, params, store.path(params),
+                               method, tolerance, max_iterations): params
+                   for params in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            params = futures[future]
+            summary = future.result()
+            store.record(params, summary)
+            if 'error' in summary:
+                failed += 1
+                status = f"failed: {summary['error']}"
+            else:
+                status = f"{summary['iterations']} iterations, converged {summary['converged']}"
+            print(f"[{done}/{len(pending)}] {store.case_id(params)} {params} {status}")
+
+    if failed:
+        print(f"{failed} cases failed, run the sweep again to retry them")
+    return store
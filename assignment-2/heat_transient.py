@@ -0,0 +1,135 @@
+import math
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+import heat_solvers
+
+
+def _directional_operators(fixed):
+    """Split of the free-cell operator A into Ax (neighbours i +- 1) and Ay (j +- 1), with their fixed-cell couplings."""
+    n = fixed.shape[0]
+    ones = np.ones(n * n)
+    horizontal = ones.copy()
+    horizontal[n - 1::n] = 0.0  # no coupling across the end of a row
+    free = np.flatnonzero(~fixed.ravel())
+    held = np.flatnonzero(fixed.ravel())
+    identity = sp.identity(len(free), format='csr')
+
+    operators = []
+    for adjacency in (sp.diags([ones[:-n], ones[:-n]], [n, -n], format='csr'),
+                      sp.diags([horizontal[:-1], horizontal[:-1]], [1, -1], format='csr')):
+        rows = adjacency[free]
+        operators.append(((2.0 * identity - rows[:, free]).tocsc(), rows[:, held].tocsr()))
+    return operators
+
+
+class TransientSolver:
+    """Time-accurate heat conduction dT/dt = diffusivity * laplacian(T) on the plate of `sim`.
+
+    Lengths are in the units of the output grid (the plate spans `extent`),
+    `diffusivity` in length^2 per second and times in seconds. Fixed cells
+    keep their temperatures; insulated edges are updated after every step.
+
+    - "ftcs": explicit Euler, only stable for dt <= dx^2 / (4 diffusivity),
+      which is `stable_dt`; larger steps are refused.
+    - "crank-nicolson": implicit and second order in time, any dt; one sparse
+      LU per step size.
+    - "adi": Peaceman-Rachford splitting, second order, two sets of
+      independent 1D line solves per step, so cheaper than Crank-Nicolson on
+      big grids.
+
+    With an `error_tolerance` (degrees per step) the step size adapts: each
+    step is compared with two half steps, rejected and retried if they differ
+    by more than the tolerance, and the next dt is scaled by the error. Step
+    sizes are rounded to quarter powers of two of `stable_dt` so the implicit
+    factorisations get reused.
+    """
+
+    SCHEMES = ('ftcs', 'crank-nicolson', 'adi')
+
+    def __init__(self, sim, diffusivity=1e-4, scheme='crank-nicolson', dt=None, error_tolerance=None, extent=9.0):
+        if scheme not in self.SCHEMES:
+            raise ValueError(f"Unknown scheme '{scheme}', expected one of {self.SCHEMES}")
+        self.sim = sim
+        self.diffusivity = diffusivity
+        self.scheme = scheme
+        self.dx = extent / (sim.grid_size - 1)
+        self.stable_dt = self.dx * self.dx / (4.0 * diffusivity)
+        if dt is None:
+            dt = self.stable_dt if scheme == 'ftcs' else 10.0 * self.stable_dt
+        if scheme == 'ftcs' and dt > self.stable_dt * (1 + 1e-12):
+            raise ValueError(f"FTCS is unstable for dt above {self.stable_dt:.4g} s on this grid and diffusivity")
+        self.dt = dt
+        self.error_tolerance = error_tolerance
+        self.order = 1 if scheme == 'ftcs' else 2
+        self.time = 0.0
+        self.steps = 0
+        self.rejected = 0
+        self.dt_range = (math.inf, 0.0)
+
+        system = heat_solvers.free_cell_system(np.asarray(sim.fixed_mask))
+        self.free, self.held = system.free, system.fixed
+        self.A, self.B = system.A, system.B
+        if scheme == 'adi':
+            (self.Ax, self.Bx), (self.Ay, self.By) = _directional_operators(np.asarray(sim.fixed_mask))
+        self._factors = {}
+
+    def _factor(self, name, matrix, dt):
+        key = (name, dt)
+        if key not in self._factors:
+            r = self.diffusivity * dt / self.dx ** 2
+            self._factors[key] = spla.splu((sp.identity(matrix.shape[0], format='csc') + 0.5 * r * matrix).tocsc())
+        return self._factors[key]
+
+    def _advance(self, u, fixed_values, dt):
+        r = self.diffusivity * dt / self.dx ** 2
+        if self.scheme == 'ftcs':
+            return u + r * (self.B @ fixed_values - self.A @ u)
+        if self.scheme == 'crank-nicolson':
+            rhs = u - 0.5 * r * (self.A @ u) + r * (self.B @ fixed_values)
+            return self._factor('cn', self.A, dt).solve(rhs)
+        boundary = 0.5 * r * (self.Bx @ fixed_values + self.By @ fixed_values)
+        half = self._factor('x', self.Ax, dt).solve(u - 0.5 * r * (self.Ay @ u) + boundary)
+        return self._factor('y', self.Ay, dt).solve(half - 0.5 * r * (self.Ax @ half) + boundary)
+
+    def _quantise(self, dt):
+        dt = self.stable_dt * 2.0 ** (math.floor(4 * math.log2(dt / self.stable_dt)) / 4)
+        return min(dt, self.stable_dt) if self.scheme == 'ftcs' else dt
+
+    def step(self, limit=math.inf):
+        """Advance by one accepted step of at most `limit` seconds; returns the dt taken."""
+        T = self.sim.temperature
+        u = T.take(self.free).astype(np.float64)
+        fixed_values = T.take(self.held).astype(np.float64)
+
+        while True:
+            dt = min(self.dt, limit)
+            if self.error_tolerance is None:
+                new = self._advance(u, fixed_values, dt)
+                break
+            full = self._advance(u, fixed_values, dt)
+            new = self._advance(self._advance(u, fixed_values, dt / 2), fixed_values, dt / 2)
+            error = np.abs(full - new).max() if len(u) else 0.0
+            scale = 2.0 if error == 0 else min(2.0, max(0.2, 0.9 * (self.error_tolerance / error) ** (1 / (self.order + 1))))
+            if error <= self.error_tolerance:
+                # A step cut short by `limit` says nothing about the step size
+                if dt == self.dt:
+                    self.dt = self._quantise(dt * scale)
+                break
+            self.rejected += 1
+            self.dt = self._quantise(dt * scale)
+
+        np.put(T, self.free, new)
+        self.sim.apply_neumann(T)
+        self.sim.iteration += 1
+        self.time += dt
+        self.steps += 1
+        self.dt_range = (min(self.dt_range[0], dt), max(self.dt_range[1], dt))
+        return dt
+
+    def advance(self, until):
+        """Step until the simulated time reaches `until` seconds, landing on it exactly."""
+        while until - self.time > 1e-9 * max(until, 1.0):
+            self.step(until - self.time)
+        self.time = max(self.time, until)
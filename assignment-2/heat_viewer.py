@@ -0,0 +1,485 @@
+import os
+import time
+import shutil
+import struct
+import zlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import vtk
+from vtkmodules.util import numpy_support
+
+
+def create_outline_actor(points_list, color=(0, 0, 0), thickness=3):
+    """Helper function to create outline actors"""
+    points = vtk.vtkPoints()
+    for point in points_list:
+        points.InsertNextPoint(point[0], point[1], point[2])
+
+    lines = vtk.vtkCellArray()
+    for i in range(len(points_list)):
+        line = vtk.vtkLine()
+        line.GetPointIds().SetId(0, i)
+        line.GetPointIds().SetId(1, (i + 1) % len(points_list))
+        lines.InsertNextCell(line)
+
+    polyData = vtk.vtkPolyData()
+    polyData.SetPoints(points)
+    polyData.SetLines(lines)
+
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(polyData)
+
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+    actor.GetProperty().SetColor(color)
+    actor.GetProperty().SetLineWidth(thickness)
+    return actor
+
+
+def create_boundaries():
+    # Outer plate outline (9" x 9"), heat source and water line
+    plate_points = [(0, 0, -4), (9, 0, -4), (9, 0, 5), (0, 0, 5), (0, 0, -4)]
+    heat_points = [(3, 0, -1), (6, 0, -1), (6, 0, 2), (3, 0, 2), (3, 0, -1)]
+    water_points = [(-0.5, 0, 0), (9.5, 0, 0)]
+    return [
+        create_outline_actor(plate_points),
+        create_outline_actor(heat_points, color=(0, 0, 0)),
+        create_outline_actor(water_points, color=(0, 0, 1)),
+    ]
+
+
+def create_water_bath():
+    plane = vtk.vtkPlaneSource()
+    plane.SetOrigin(-0.5, 0, -4.5)  # Slightly wider than plate
+    plane.SetPoint1(9.5, 0, -4.5)
+    plane.SetPoint2(-0.5, 0, 0)     # Up to water line
+
+    water_mapper = vtk.vtkPolyDataMapper()
+    water_mapper.SetInputConnection(plane.GetOutputPort())
+
+    water_actor = vtk.vtkActor()
+    water_actor.SetMapper(water_mapper)
+    water_actor.GetProperty().SetColor(0.4, 0.7, 1.0)
+    water_actor.GetProperty().SetOpacity(0.3)
+    return [water_actor]
+
+
+def create_scalar_bar(lut):
+    scalar_bar = vtk.vtkScalarBarActor()
+    scalar_bar.SetLookupTable(lut)
+    scalar_bar.SetTitle("Temperature (°F)")
+    scalar_bar.SetNumberOfLabels(5)
+    scalar_bar.SetPosition(0.85, 0.2)
+    scalar_bar.SetWidth(0.1)
+    scalar_bar.SetHeight(0.6)
+    scalar_bar.GetTitleTextProperty().SetColor(0, 0, 0)
+    scalar_bar.GetTitleTextProperty().SetFontSize(12)
+    scalar_bar.GetLabelTextProperty().SetColor(0, 0, 0)
+    scalar_bar.GetLabelTextProperty().SetFontSize(10)
+    return scalar_bar
+
+
+def create_plate_surface(grid_size):
+    """Quad mesh of the plate in the x-z plane, built once with NumPy.
+
+    Point i * grid_size + j sits at x = 9i/(n-1), z = 9j/(n-1) - 4, so the
+    simulation's C-ordered field lines up with the points without reordering.
+    """
+    axis = 9.0 * np.arange(grid_size) / (grid_size - 1)
+    coords = np.zeros((grid_size, grid_size, 3))
+    coords[:, :, 0] = axis[:, None]
+    coords[:, :, 2] = axis[None, :] - 4
+    coords = coords.reshape(-1, 3)
+
+    i, j = np.meshgrid(np.arange(grid_size - 1), np.arange(grid_size - 1), indexing='ij')
+    corner = (i * grid_size + j).ravel()
+    connectivity = np.column_stack([corner, corner + grid_size, corner + grid_size + 1, corner + 1]).ravel()
+    offsets = np.arange(0, len(connectivity) + 1, 4)
+
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(coords, deep=True))
+    quads = vtk.vtkCellArray()
+    quads.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets.astype(np.int64), deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(connectivity.astype(np.int64), deep=True))
+
+    surface = vtk.vtkPolyData()
+    surface.SetPoints(points)
+    surface.SetPolys(quads)
+    return surface
+
+
+class LiveTemperature:
+    """Point scalars that share memory with the simulation's field.
+
+    Each of the simulation's ping-pong buffers is wrapped once with
+    numpy_to_vtk, update() just points the surface at whichever one is
+    current and marks it Modified(). Nothing is copied or allocated per frame.
+    """
+
+    def __init__(self, sim, surface):
+        self.sim = sim
+        self.surface = surface
+        self._arrays = {}
+        self._current = None
+        self.update()
+
+    def _wrap(self, buffer):
+        key = id(buffer)
+        if key not in self._arrays:
+            if len(self._arrays) >= 2:
+                # An engine that allocates a new field every step, drop stale wrappers
+                self._arrays.clear()
+            array = numpy_support.numpy_to_vtk(buffer.reshape(-1))
+            array.SetName("Temperature")
+            # Keep the NumPy buffer alive for as long as VTK points at it
+            self._arrays[key] = (buffer, array)
+        return self._arrays[key][1]
+
+    def update(self):
+        array = self._wrap(self.sim.temperature)
+        if array is not self._current:
+            self.surface.GetPointData().SetScalars(array)
+            self._current = array
+        array.Modified()
+
+
+class PlateScene:
+    """The plate, water bath, outlines, scalar bar and timestep text, ready to render."""
+
+    def __init__(self, sim, offscreen=False, size=(900, 900), source=None):
+        # `source` is anything with a .temperature field, the simulation by default
+        self.surface = create_plate_surface(sim.grid_size)
+        self.temperature = LiveTemperature(source or sim, self.surface)
+
+        lut = vtk.vtkLookupTable()
+        lut.SetHueRange(0.667, 0.0)  # Blue to red
+        lut.SetTableRange(32, 212)
+        lut.SetNumberOfColors(256)
+        lut.Build()
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputData(self.surface)
+        mapper.SetLookupTable(lut)
+        mapper.SetScalarRange(32, 212)
+        plate_actor = vtk.vtkActor()
+        plate_actor.SetMapper(mapper)
+
+        self.renderer = vtk.vtkRenderer()
+        for actor in create_water_bath():
+            self.renderer.AddActor(actor)
+        self.renderer.AddActor(plate_actor)
+        for actor in create_boundaries():
+            self.renderer.AddActor(actor)
+        self.renderer.SetBackground(1, 1, 1)
+
+        self.timestep_text = vtk.vtkTextActor()
+        self.timestep_text.SetInput(f"Timestep: {sim.iteration}")
+        self.timestep_text.GetTextProperty().SetFontSize(24)
+        self.timestep_text.GetTextProperty().SetColor(0, 0, 0)
+        self.timestep_text.SetPosition(20, 20)
+        self.renderer.AddViewProp(self.timestep_text)
+
+        self.rate_text = vtk.vtkTextActor()
+        self.rate_text.GetTextProperty().SetFontSize(18)
+        self.rate_text.GetTextProperty().SetColor(0, 0, 0)
+        self.rate_text.SetPosition(20, 55)
+        self.renderer.AddViewProp(self.rate_text)
+        self.renderer.AddViewProp(create_scalar_bar(lut))
+
+        camera = self.renderer.GetActiveCamera()
+        camera.SetPosition(4.5, -15, 0.5)
+        camera.SetFocalPoint(4.5, 0, 0.5)
+        camera.SetViewUp(0, 0, 1)
+        camera.SetParallelProjection(True)
+        camera.SetParallelScale(5)
+
+        self.render_window = vtk.vtkRenderWindow()
+        self.render_window.SetOffScreenRendering(offscreen)
+        self.render_window.AddRenderer(self.renderer)
+        self.render_window.SetSize(*size)
+
+    def update(self, iteration):
+        self.temperature.update()
+        self.timestep_text.SetInput(f"Timestep: {iteration}")
+
+
+class Fixed2DInteractor(vtk.vtkInteractorStyleImage):
+    def __init__(self):
+        self.AddObserver("LeftButtonPressEvent", self.dummy_function)
+        self.AddObserver("RightButtonPressEvent", self.dummy_function)
+        self.AddObserver("MiddleButtonPressEvent", self.dummy_function)
+
+    def dummy_function(self, obj, event):
+        pass
+
+
+class AnimationCallback():
+    def __init__(self, sim, scene, num_steps, steps_per_frame=10, tolerance=0.01):
+        self.sim = sim
+        self.scene = scene
+        self.num_steps = num_steps
+        self.steps_per_frame = steps_per_frame
+        self.tolerance = tolerance
+        self.current_step = 0
+
+    def execute(self, obj, event):
+        for _ in range(self.steps_per_frame):
+            max_change = self.sim.iterate()
+            if max_change < self.tolerance or self.current_step >= self.num_steps:
+                obj.DestroyTimer()
+                return
+            self.current_step += 1
+
+        self.scene.update(self.sim.iteration)
+        self.scene.render_window.Render()
+
+
+def create_vtk_visualization(sim, num_steps=1000, steps_per_frame=10):
+    """Animate `sim` in an interactive window, stepping it from a VTK timer."""
+    scene = PlateScene(sim)
+
+    interactor = vtk.vtkRenderWindowInteractor()
+    interactor.SetRenderWindow(scene.render_window)
+    interactor.SetInteractorStyle(Fixed2DInteractor())
+
+    callback = AnimationCallback(sim, scene, num_steps, steps_per_frame)
+    interactor.Initialize()
+    interactor.AddObserver('TimerEvent', callback.execute)
+    interactor.CreateRepeatingTimer(10)
+    interactor.Start()
+
+
+class FramePublisher:
+    """Latest-frame hand-off between a solver thread and the renderer.
+
+    Two buffers: the renderer shows one while the solver copies into the
+    other. A finished copy becomes the newest frame and the renderer switches
+    to it on its next tick. It never switches to a buffer that is being
+    written, and the solver never writes the one on screen. `.temperature`
+    is the buffer on screen, so LiveTemperature can wrap both buffers once.
+    """
+
+    def __init__(self, field):
+        self.buffers = [field.copy(), field.copy()]
+        self._lock = threading.Lock()
+        self._shown = 0
+        self._ready = None
+        self._writing = None
+        self.step = 0
+        self.published = 0
+
+    def publish(self, field, step):
+        with self._lock:
+            target = 1 - self._shown
+            self._writing = target
+        np.copyto(self.buffers[target], field)
+        with self._lock:
+            self._writing = None
+            self._ready = (target, step)
+            self.published += 1
+
+    def acquire(self):
+        """Switch to the newest complete frame if there is one; returns its step or None."""
+        with self._lock:
+            if self._ready is None or self._ready[0] == self._writing:
+                return None
+            self._shown, step = self._ready
+            self._ready = None
+            self.step = step
+            return step
+
+    @property
+    def temperature(self):
+        return self.buffers[self._shown]
+
+
+class ThreadedAnimation:
+    """Steps the simulation on a worker thread while the renderer shows the newest frame.
+
+    The solver never waits for rendering and the renderer never waits for the
+    solver. render_frame() is meant to be called at the target frame rate and
+    also updates the steps/s vs frames/s readout.
+    """
+
+    def __init__(self, sim, num_steps=1000, tolerance=0.01, offscreen=False):
+        self.sim = sim
+        self.num_steps = num_steps
+        self.tolerance = tolerance
+        self.publisher = FramePublisher(sim.temperature)
+        self.scene = PlateScene(sim, offscreen=offscreen, source=self.publisher)
+
+        self.steps = 0
+        self.frames = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._solve, name="heat-solver", daemon=True)
+        self._rate_mark = (time.perf_counter(), 0, 0)
+
+    def _solve(self):
+        while not self._stop.is_set() and self.steps < self.num_steps:
+            max_change = self.sim.iterate()
+            self.steps += 1
+            self.publisher.publish(self.sim.temperature, self.sim.iteration)
+            if max_change < self.tolerance:
+                break
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def render_frame(self):
+        step = self.publisher.acquire()
+        if step is not None:
+            self.scene.update(step)
+        self.frames += 1
+
+        now = time.perf_counter()
+        mark_time, mark_steps, mark_frames = self._rate_mark
+        if now - mark_time >= 0.5:
+            steps_per_second = (self.steps - mark_steps) / (now - mark_time)
+            frames_per_second = (self.frames - mark_frames) / (now - mark_time)
+            self.scene.rate_text.SetInput(f"{steps_per_second:.0f} steps/s  {frames_per_second:.1f} frames/s")
+            self._rate_mark = (now, self.steps, self.frames)
+        self.scene.render_window.Render()
+
+
+def create_threaded_visualization(sim, num_steps=1000, fps=30):
+    """Like create_vtk_visualization, but the solver runs on its own thread at full speed."""
+    animation = ThreadedAnimation(sim, num_steps)
+
+    interactor = vtk.vtkRenderWindowInteractor()
+    interactor.SetRenderWindow(animation.scene.render_window)
+    interactor.SetInteractorStyle(Fixed2DInteractor())
+    interactor.Initialize()
+    interactor.AddObserver('TimerEvent', lambda obj, event: animation.render_frame())
+    interactor.CreateRepeatingTimer(max(1, int(1000 / fps)))
+
+    animation.start()
+    interactor.Start()
+    animation.stop()
+
+
+def encode_png(rgb, filename, level=6):
+    """Write an (h, w, 3) uint8 image as PNG using only zlib.
+
+    zlib releases the GIL while compressing, so frames encode in parallel on
+    a thread pool.
+    """
+    height, width, _ = rgb.shape
+    # Every scanline starts with filter type 0
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    with open(filename, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), level)))
+        f.write(chunk(b'IEND', b''))
+
+
+class _Field:
+    """Stands in for the simulation when a scene is fed fields one at a time."""
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.iteration = 0
+        self.temperature = np.zeros((grid_size, grid_size))
+
+
+class FrameRecorder:
+    """Renders snapshots of the plate scene offscreen, for machines without a display.
+
+    Has the same write()/close() interface as the writers in heat_output, so
+    it plugs into the simulation loop together with the snapshot policies.
+    `output` is either a directory that gets frame_XXXX.png files, or a video
+    file name (.mp4, .webm, ...) that is encoded by ffmpeg. PNG frames are
+    encoded on a pool of `workers` threads. For video, frames go in order to
+    one ffmpeg process, which spreads the encoding over its own threads.
+    """
+
+    VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.webm', '.avi', '.mov')
+
+    def __init__(self, grid_size, output, fps=30, size=(900, 900), workers=None):
+        self.field = _Field(grid_size)
+        self.scene = PlateScene(self.field, offscreen=True, size=size)
+        self.capture = vtk.vtkWindowToImageFilter()
+        self.capture.SetInput(self.scene.render_window)
+        self.capture.SetInputBufferTypeToRGB()
+        self.capture.ReadFrontBufferOff()
+
+        self.output = output
+        self.frames = 0
+        self.video = os.path.splitext(output)[1].lower() in self.VIDEO_EXTENSIONS
+        if self.video:
+            ffmpeg = shutil.which('ffmpeg')
+            if ffmpeg is None:
+                raise RuntimeError("video output needs ffmpeg on the PATH, or write PNG frames to a directory")
+            width, height = size
+            self._ffmpeg = subprocess.Popen(
+                [ffmpeg, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+                 '-pix_fmt', 'yuv420p', '-threads', '0', output],
+                stdin=subprocess.PIPE)
+            # A single worker keeps the frames in order
+            workers = 1
+        else:
+            os.makedirs(output, exist_ok=True)
+            workers = workers or os.cpu_count()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._pending = []
+        self._max_pending = 2 * workers
+
+    def render(self, temperature, step):
+        """Render one field and return the image as an (h, w, 3) uint8 array."""
+        self.field.temperature = temperature
+        self.scene.update(step)
+        self.scene.render_window.Render()
+        self.capture.Modified()
+        self.capture.Update()
+        image = self.capture.GetOutput()
+        width, height, _ = image.GetDimensions()
+        pixels = numpy_support.vtk_to_numpy(image.GetPointData().GetScalars())
+        # VTK images start at the bottom row
+        return pixels.reshape(height, width, 3)[::-1].copy()
+
+    def write(self, temperature, step, time=None):
+        rgb = self.render(temperature, step)
+        if self.video:
+            future = self._pool.submit(self._ffmpeg.stdin.write, rgb.tobytes())
+        else:
+            filename = os.path.join(self.output, f"frame_{self.frames:04d}.png")
+            future = self._pool.submit(encode_png, rgb, filename)
+        self.frames += 1
+
+        # Bound the frames held in memory, and surface encoder errors early
+        self._pending.append(future)
+        while len(self._pending) > self._max_pending:
+            self._pending.pop(0).result()
+
+    def close(self):
+        for future in self._pending:
+            future.result()
+        self._pending = []
+        self._pool.shutdown()
+        if self.video:
+            self._ffmpeg.stdin.close()
+            if self._ffmpeg.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to encode {self.output}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,152 @@
+import numpy as np
+
+
+def box(lo, hi):
+    """Index region of the cells with lo <= (i, j, k) < hi, for use as a fixed sub-volume."""
+    return tuple(slice(a, b) for a, b in zip(lo, hi))
+
+
+def middle_third(shape):
+    """The default heat source: the middle third of the block along every axis."""
+    return box([n // 3 for n in shape], [2 * n // 3 for n in shape])
+
+
+def jacobi_slab(old, new, fixed_mask, start, stop):
+    """7-point Jacobi update of planes start..stop-1 (interior only) from `old` into `new`.
+
+    Reads planes start-1 and stop from `old` as halos and writes straight into
+    `new`, so no temporary of the slab is made.
+    """
+    slab = new[start:stop, 1:-1, 1:-1]
+    np.add(old[start - 1:stop - 1, 1:-1, 1:-1], old[start + 1:stop + 1, 1:-1, 1:-1], out=slab)
+    np.add(slab, old[start:stop, :-2, 1:-1], out=slab)
+    np.add(slab, old[start:stop, 2:, 1:-1], out=slab)
+    np.add(slab, old[start:stop, 1:-1, :-2], out=slab)
+    np.add(slab, old[start:stop, 1:-1, 2:], out=slab)
+    np.divide(slab, 6, out=slab)
+    np.copyto(slab, old[start:stop, 1:-1, 1:-1], where=fixed_mask[start:stop, 1:-1, 1:-1])
+
+
+class VolumeHeatSimulation:
+    """Heat distribution in a 3D block, relaxed with a 7-point stencil.
+
+    The block generalises the plate: the two faces across the last axis hold
+    `left_temp` and `right_temp`, the other four faces run linearly between
+    them, and each of `regions` is held at its own temperature. A region is a
+    tuple of slices (see `box`) or a boolean mask of the block's shape; by
+    default it is the middle third at `source_temp`.
+
+    Updates work through slabs of `slab_planes` planes with preallocated
+    scratch. "jacobi" ping-pongs between two buffers like the plate engines.
+    "red-black" updates the field in place, one colour at a time, so a block
+    needs a single field buffer. That matters at 512^3, where each float64
+    buffer is 1 GB. It needs about 40% fewer sweeps, each costing about
+    twice a Jacobi sweep.
+    """
+
+    SCHEMES = ('jacobi', 'red-black')
+
+    def __init__(self, shape=90, scheme='red-black', left_temp=32, right_temp=100, initial_temp=70,
+                 source_temp=212, regions=None, dtype=np.float64, slab_planes=8):
+        if scheme not in self.SCHEMES:
+            raise ValueError(f"Unknown scheme '{scheme}', expected one of {self.SCHEMES}")
+        self.shape = (shape,) * 3 if np.isscalar(shape) else tuple(shape)
+        if min(self.shape) < 3:
+            raise ValueError(f"Every axis needs at least 3 cells, got {self.shape}")
+        self.scheme = scheme
+        self.left_temp = left_temp
+        self.right_temp = right_temp
+        self.initial_temp = initial_temp
+        self.regions = [(middle_third(self.shape), source_temp)] if regions is None else list(regions)
+        self.dtype = dtype
+        self.slab_planes = slab_planes
+        self.temperature = np.empty(self.shape, dtype=dtype)
+        self.initialize_conditions()
+        self.iteration = 0
+
+        interior = (slab_planes, self.shape[1] - 2, self.shape[2] - 2)
+        self._scratch = np.empty(interior, dtype=dtype)
+        if scheme == 'jacobi':
+            self._buffer = self.temperature.copy()
+        else:
+            self._diff = np.empty(interior, dtype=dtype)
+            self._update = np.empty(interior, dtype=bool)
+            # Checkerboard of one plane's interior, by parity of j + k
+            j, k = np.indices(interior[1:])
+            self._parity = [(j + k) % 2 == 0, (j + k) % 2 == 1]
+
+    def initialize_conditions(self):
+        T = self.temperature
+        T.fill(self.initial_temp)
+        self.fixed_mask = np.zeros(self.shape, dtype=bool)
+
+        for region, temperature in self.regions:
+            T[region] = temperature
+            self.fixed_mask[region] = True
+
+        gradient = self.left_temp + (self.right_temp - self.left_temp) * (np.arange(self.shape[2]) / (self.shape[2] - 1))
+        T[[0, -1], :, :] = gradient
+        T[:, [0, -1], :] = gradient
+        T[:, :, 0] = self.left_temp
+        T[:, :, -1] = self.right_temp
+        self.fixed_mask[[0, -1], :, :] = True
+        self.fixed_mask[:, [0, -1], :] = True
+        self.fixed_mask[:, :, [0, -1]] = True
+
+    def _slabs(self):
+        return ((start, min(start + self.slab_planes, self.shape[0] - 1))
+                for start in range(1, self.shape[0] - 1, self.slab_planes))
+
+    def iterate(self, check=True):
+        """One sweep; returns the max change, or None when `check` is off."""
+        if self.scheme == 'jacobi':
+            max_change = self._iterate_jacobi(check)
+        else:
+            red = self._relax_colour(0, check)
+            black = self._relax_colour(1, check)
+            max_change = max(red, black) if check else None
+        self.iteration += 1
+        return max_change
+
+    def _iterate_jacobi(self, check):
+        old, new = self.temperature, self._buffer
+        worst = 0.0
+        for start, stop in self._slabs():
+            jacobi_slab(old, new, self.fixed_mask, start, stop)
+            if check:
+                diff = self._scratch[:stop - start]
+                np.subtract(new[start:stop, 1:-1, 1:-1], old[start:stop, 1:-1, 1:-1], out=diff)
+                np.abs(diff, out=diff)
+                worst = max(worst, diff.max())
+        self.temperature, self._buffer = new, old
+        return worst if check else None
+
+    def _relax_colour(self, colour, check):
+        # Cells of one colour only have neighbours of the other colour, so
+        # they can all be updated in place in any order
+        T = self.temperature
+        worst = 0.0
+        for start, stop in self._slabs():
+            planes = stop - start
+            total = self._scratch[:planes]
+            np.add(T[start - 1:stop - 1, 1:-1, 1:-1], T[start + 1:stop + 1, 1:-1, 1:-1], out=total)
+            np.add(total, T[start:stop, :-2, 1:-1], out=total)
+            np.add(total, T[start:stop, 2:, 1:-1], out=total)
+            np.add(total, T[start:stop, 1:-1, :-2], out=total)
+            np.add(total, T[start:stop, 1:-1, 2:], out=total)
+            np.divide(total, 6, out=total)
+
+            update = self._update[:planes]
+            for offset in range(planes):
+                # Free cells of this colour: parity & ~fixed
+                np.greater(self._parity[(colour + start + offset) % 2],
+                           self.fixed_mask[start + offset, 1:-1, 1:-1], out=update[offset])
+
+            current = T[start:stop, 1:-1, 1:-1]
+            if check:
+                diff = self._diff[:planes]
+                np.subtract(total, current, out=diff)
+                np.abs(diff, out=diff)
+                worst = max(worst, np.max(diff, where=update, initial=0.0))
+            np.copyto(current, total, where=update)
+        return worst